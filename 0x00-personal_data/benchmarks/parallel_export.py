@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+""" Benchmark: rows/sec of export_users by number of worker processes
+
+Rows come from a temporary SQLite stand-in of the users table and the
+output goes to os.devnull.
+
+Usage (from the project root):
+    python3 -m benchmarks.parallel_export [rows] [max_workers]
+"""
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+from filtered_logger import RedactingFormatter, PII_FIELDS, export_users
+
+
+def seed(file_path: str, count: int) -> None:
+    """Creates a users table with count rows."""
+    db = sqlite3.connect(file_path)
+    db.execute("CREATE TABLE users (name TEXT, email TEXT, phone TEXT, "
+               "ssn TEXT, password TEXT, ip TEXT, last_login TEXT, "
+               "user_agent TEXT)")
+    db.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (("user{}".format(i), "user{}@hbtn.io".format(i),
+          "555-{:04d}".format(i % 10000), "000-00-{:04d}".format(i % 10000),
+          "pw{}".format(i), "10.0.0.1", "2019-11-14 06:16:24",
+          "Mozilla/5.0") for i in range(count)))
+    db.commit()
+    db.close()
+
+
+def devnull_logger(stream) -> logging.Logger:
+    """Redacting logger writing to stream."""
+    logger = logging.getLogger("user_data.benchmark")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.handlers = []
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(RedactingFormatter(fields=PII_FIELDS))
+    logger.addHandler(handler)
+    return logger
+
+
+def main(count: int = 200000, max_workers: int = os.cpu_count() or 1):
+    """Prints rows/sec for 1, 2, 4... up to max_workers processes."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "users.db")
+        seed(file_path, count)
+        with open(os.devnull, "w") as stream:
+            logger = devnull_logger(stream)
+            workers = 1
+            while workers <= max_workers:
+                db = sqlite3.connect(file_path)
+                stats = export_users(db, logger, batch_size=2000,
+                                     workers=workers)
+                db.close()
+                print("workers: {:>3}  {:>10,.0f} rows/sec".format(
+                    workers, stats['rows_per_sec']))
+                workers *= 2
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" Microbenchmark: records/sec redacted by RedactingFormatter
+
+Usage (from the project root):
+    python3 -m benchmarks.redaction [records] [extra_fields]
+"""
+import logging
+import re
+import sys
+import time
+from typing import List
+from filtered_logger import PII_FIELDS, RedactingFormatter
+
+
+def legacy_filter_datum(
+        fields: List[str],
+        redaction: str,
+        message: str,
+        separator: str
+) -> str:
+    """filter_datum as it was before the pattern was precompiled."""
+    pattern = r'({})=([^{}]*)'.format('|'.join(fields), separator)
+    return re.sub(pattern, r'\1={}'.format(redaction), message)
+
+
+class LegacyRedactingFormatter(RedactingFormatter):
+    """RedactingFormatter calling legacy_filter_datum."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Formats the log record, filtering sensitive fields."""
+        record.msg = legacy_filter_datum(
+            self.fields,
+            self.REDACTION,
+            record.getMessage(),
+            self.SEPARATOR
+        )
+        return logging.Formatter.format(self, record)
+
+
+def records_per_sec(formatter: logging.Formatter,
+                    messages: List[str]) -> float:
+    """Formats one record per message, returns the throughput."""
+    records = [logging.LogRecord("user_data", logging.INFO, None, None,
+                                 message, None, None)
+               for message in messages]
+    start = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    return len(records) / (time.perf_counter() - start)
+
+
+def main(count: int = 100000, extra_fields: int = 0):
+    """Prints records/sec of both formatters."""
+    fields = list(PII_FIELDS) + ["field{}".format(i)
+                                 for i in range(extra_fields)]
+    messages = [
+        "name=user{0};email=user{0}@hbtn.io;phone=555-{0:04d};"
+        "ssn=000-00-{0:04d};password=pw{0};ip=10.0.0.1;"
+        "last_login=2019-11-14T06:16:24;user_agent=Mozilla/5.0;".format(i)
+        for i in range(count)
+    ]
+    print("records: {}, fields: {}".format(count, len(fields)))
+    for name, cls in (("legacy", LegacyRedactingFormatter),
+                      ("precompiled", RedactingFormatter)):
+        print("{:>12}: {:,.0f} records/sec".format(
+            name, records_per_sec(cls(fields=fields), messages)))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
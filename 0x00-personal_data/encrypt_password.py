@@ -3,9 +3,172 @@
 encrypt_password module
 """
 
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
 import bcrypt
 
 
+# bcrypt.gensalt() default cost, used when nothing is configured
+DEFAULT_ROUNDS = 12
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+
+def calibrate_rounds(target_ms: float) -> int:
+    """
+    Finds the bcrypt cost factor whose hashing time on this machine is
+    closest to target_ms.
+
+    Each extra round doubles the hashing time, so a single measurement
+    at a cheap cost is enough to extrapolate.
+
+    Args:
+        target_ms (float): Wanted time per hash, in milliseconds.
+
+    Returns:
+        int: The cost factor, between MIN_ROUNDS and MAX_ROUNDS.
+    """
+    probe_rounds = 8
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(probe_rounds))
+    elapsed_ms = max((time.perf_counter() - start) * 1000, 1e-3)
+    rounds = probe_rounds + round(math.log2(target_ms / elapsed_ms))
+    return max(MIN_ROUNDS, min(MAX_ROUNDS, rounds))
+
+
+def configured_rounds() -> int:
+    """
+    Returns the bcrypt cost factor from the environment.
+
+    BCRYPT_ROUNDS sets it explicitly; otherwise BCRYPT_TARGET_MS
+    calibrates it against this machine; otherwise DEFAULT_ROUNDS.
+
+    Returns:
+        int: The cost factor.
+    """
+    if os.getenv('BCRYPT_ROUNDS'):
+        return int(os.getenv('BCRYPT_ROUNDS'))
+    if os.getenv('BCRYPT_TARGET_MS'):
+        return calibrate_rounds(float(os.getenv('BCRYPT_TARGET_MS')))
+    return DEFAULT_ROUNDS
+
+
+def hash_rounds(hashed_password: bytes) -> int:
+    """
+    Reads the cost factor stored in a bcrypt hash ($2b$<cost>$...).
+
+    Args:
+        hashed_password (bytes): The bcrypt hash.
+
+    Returns:
+        int: The cost factor, or 0 if the hash can't be parsed.
+    """
+    try:
+        return int(hashed_password.split(b'$')[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+class HashingService:
+    """
+    Runs bcrypt on a bounded pool of worker threads.
+
+    bcrypt releases the GIL while hashing, so worker threads use every
+    core. At most max_pending hashes are queued or running; callers
+    beyond that block until a slot frees up instead of piling up work.
+    """
+
+    def __init__(
+            self,
+            rounds: Optional[int] = None,
+            max_workers: Optional[int] = None,
+            max_pending: Optional[int] = None
+    ):
+        """
+        Args:
+            rounds (int): bcrypt cost factor, configured_rounds() if None.
+            max_workers (int): Worker threads, one per CPU if None.
+            max_pending (int): Hashes queued or running at once,
+            4 per worker if None.
+        """
+        self.rounds = rounds if rounds is not None else configured_rounds()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(
+            max_pending or 4 * self.max_workers)
+
+    def _submit(self, fn, *args) -> Future:
+        """Runs fn(*args) on the pool once a pending slot is free."""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def submit_hash(self, password: str) -> Future:
+        """Schedules the hashing of password, returns a Future."""
+        return self._submit(
+            bcrypt.hashpw, password.encode('utf-8'),
+            bcrypt.gensalt(self.rounds))
+
+    def hash(self, password: str) -> bytes:
+        """Hashes password on the pool and waits for the result."""
+        return self.submit_hash(password).result()
+
+    def check(self, hashed_password: bytes, password: str) -> bool:
+        """Checks password against hashed_password on the pool."""
+        return self._submit(
+            bcrypt.checkpw, password.encode('utf-8'),
+            hashed_password).result()
+
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        """True if hashed_password was made with a lower cost than the
+        current one. Only upgrades: processes calibrating to slightly
+        different costs must not rehash the same user back and forth.
+        """
+        return hash_rounds(hashed_password) < self.rounds
+
+    def check_and_rehash(
+            self, hashed_password: bytes, password: str
+    ) -> Optional[bytes]:
+        """
+        Checks password and, when it matches a hash made with a lower
+        cost, hashes it again with the current one.
+
+        Returns:
+            bytes: The new hash to store, or None if the password is
+            wrong or the stored hash is up to date.
+        """
+        if not self.check(hashed_password, password):
+            return None
+        if not self.needs_rehash(hashed_password):
+            return None
+        return self.hash(password)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_hashing_service() -> HashingService:
+    """Returns the process-wide HashingService, created on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = HashingService()
+    return _service
+
+
 def hash_password(password: str) -> bytes:
     """
     Hashes a password using bcrypt with a generated salt.
@@ -16,9 +179,7 @@ def hash_password(password: str) -> bytes:
     Returns:
         bytes: The salted, hashed password.
     """
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed_password
+    return get_hashing_service().hash(password)
 
 
 def is_valid(hashed_password: bytes, password: str) -> bool:
@@ -7,8 +7,18 @@ import re
 import os
 import mysql.connector
 from mysql.connector.connection import MySQLConnection
-from typing import List, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, List, Optional, Pattern, Tuple
+import atexit
 import logging
+import logging.handlers
+import queue
+import sqlite3
+import sys
+import threading
+import time
 
 
 # Define sensitive fields to redact in logs
@@ -21,6 +31,45 @@ PII_FIELDS: Tuple[str, ...] = (
 )
 
 
+def _alternation(fields: Tuple[str, ...]) -> str:
+    """
+    Builds a regex alternation matching any of fields.
+
+    Plain field names are merged into a prefix tree, so matching at a
+    position costs the length of the longest field rather than one try
+    per field. Names with regex syntax or '=' keep the plain
+    alternation, whose priority rules they may depend on.
+    """
+    if any(re.escape(field) != field or '=' in field for field in fields):
+        return '|'.join(fields)
+
+    trie = {}
+    for field in fields:
+        node = trie
+        for char in field:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = [char + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        group = '(?:{})'.format('|'.join(branches))
+        return group + '?' if '' in node else group
+
+    return build(trie)
+
+
+@lru_cache(maxsize=64)
+def redaction_pattern(fields: Tuple[str, ...], separator: str) -> Pattern:
+    """Compiles, once per (fields, separator), the filter_datum regex."""
+    return re.compile(
+        r'({})=([^{}]*)'.format(_alternation(fields), separator))
+
+
 def filter_datum(
         fields: List[str],
         redaction: str,
@@ -28,8 +77,8 @@ def filter_datum(
         separator: str
 ) -> str:
     """Obfuscates specified fields in a log message."""
-    pattern = r'({})=([^{}]*)'.format('|'.join(fields), separator)
-    return re.sub(pattern, r'\1={}'.format(redaction), message)
+    pattern = redaction_pattern(tuple(fields), separator)
+    return pattern.sub(r'\1={}'.format(redaction), message)
 
 
 class RedactingFormatter(logging.Formatter):
@@ -42,26 +91,139 @@ class RedactingFormatter(logging.Formatter):
     def __init__(self, fields: List[str]):
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
+        self._pattern = redaction_pattern(tuple(fields), self.SEPARATOR)
+        self._replacement = r'\1={}'.format(self.REDACTION)
 
     def format(self, record: logging.LogRecord) -> str:
         """Formats the log record, filtering sensitive fields."""
-        record.msg = filter_datum(
-            self.fields,
-            self.REDACTION,
-            record.getMessage(),
-            self.SEPARATOR
-        )
+        record.msg = self._pattern.sub(self._replacement, record.getMessage())
         return super().format(record)
 
 
-def get_logger() -> logging.Logger:
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a bounded queue.
+
+    With the "block" policy a full queue makes the caller wait (at most
+    timeout seconds, then the record is dropped); with "drop" the record
+    is dropped at once. Dropped records are counted in `dropped`.
+    """
+
+    def __init__(
+            self,
+            log_queue: queue.Queue,
+            policy: str = "block",
+            timeout: Optional[float] = None
+    ):
+        super(BoundedQueueHandler, self).__init__(log_queue)
+        if policy not in ("block", "drop"):
+            raise ValueError("policy must be 'block' or 'drop'")
+        self.policy = policy
+        self.timeout = timeout
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Puts the record on the queue according to the policy."""
+        try:
+            if self.policy == "drop":
+                self.queue.put_nowait(record)
+            else:
+                self.queue.put(record, timeout=self.timeout)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener:
+    """
+    Background thread formatting queued records with the handler's
+    formatter and writing them to its stream in batches of up to
+    batch_size records, with a single flush per batch.
+    """
+
+    _STOP = None
+
+    def __init__(
+            self,
+            log_queue: queue.Queue,
+            handler: logging.StreamHandler,
+            batch_size: int = 256
+    ):
+        self.queue = log_queue
+        self.handler = handler
+        self.batch_size = batch_size
+        self._thread = None
+
+    def start(self) -> None:
+        """Starts the writer thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Writes every queued record, then stops the writer thread."""
+        if self._thread is None:
+            return
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        """Formats and writes one batch."""
+        handler = self.handler
+        lines = [handler.format(record) + handler.terminator
+                 for record in batch if record.levelno >= handler.level]
+        if not lines:
+            return
+        with handler.lock:
+            handler.stream.write(''.join(lines))
+            handler.flush()
+
+    def _run(self) -> None:
+        """Writer loop: block for one record, drain what else is queued."""
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self._STOP in batch:
+                stopping = True
+                batch = [record for record in batch
+                         if record is not self._STOP]
+            try:
+                self._write(batch)
+            except Exception:
+                for record in batch:
+                    self.handler.handleError(record)
+
+
+# Listener of the asynchronous "user_data" logger, if any
+_listener = None
+
+
+def get_logger(
+        async_mode: bool = False,
+        queue_size: int = 10000,
+        policy: str = "block"
+) -> logging.Logger:
     """
     Creates and configures a logger to redact sensitive
     fields in logs.
 
+    Args:
+        async_mode (bool): If True, logging calls only enqueue the
+        record; redaction and stream writes happen on a background
+        thread, and queued records are flushed at interpreter exit.
+        queue_size (int): Capacity of the queue in async mode.
+        policy (str): "block" or "drop", what to do when the queue
+        is full in async mode (see BoundedQueueHandler).
+
     Returns:
         logging.Logger: Configured logger instance.
     """
+    global _listener
     logger = logging.getLogger("user_data")
     logger.setLevel(logging.INFO)
     logger.propagate = False
@@ -69,7 +231,24 @@ def get_logger() -> logging.Logger:
     # Set up StreamHandler with RedactingFormatter
     stream_handler = logging.StreamHandler()
     stream_handler.setFormatter(RedactingFormatter(fields=PII_FIELDS))
-    logger.addHandler(stream_handler)
+    if not async_mode:
+        logger.addHandler(stream_handler)
+        return logger
+
+    if _listener is not None:
+        _listener.stop()
+    # Replace the handlers of earlier calls, synchronous ones included:
+    # a leftover StreamHandler would print every record a second time
+    # and keep the caller blocked on the stream
+    for handler in list(logger.handlers):
+        if (isinstance(handler, BoundedQueueHandler) or
+                type(handler) is logging.StreamHandler):
+            logger.removeHandler(handler)
+    log_queue = queue.Queue(maxsize=queue_size)
+    logger.addHandler(BoundedQueueHandler(log_queue, policy))
+    _listener = BatchingQueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
 
     return logger
 
@@ -105,34 +284,414 @@ def get_db() -> MySQLConnection:
         raise  # Reraise the error after logging it
 
 
+class PooledConnection:
+    """
+    Connection checked out of a ConnectionPool. Behaves like the
+    underlying connection, except that close() gives it back to the pool.
+    """
+
+    def __init__(self, pool: "ConnectionPool", connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name: str):
+        """Forwards everything else to the underlying connection."""
+        if self._connection is None:
+            raise AttributeError("connection returned to the pool")
+        return getattr(self._connection, name)
+
+    def close(self) -> None:
+        """Returns the connection to the pool (only the first time)."""
+        if self._connection is not None:
+            self._pool.release(self._connection)
+            self._connection = None
+
+    def __enter__(self):
+        """Context manager entry: the connection itself."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Context manager exit: returns the connection to the pool."""
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections.
+
+    Keeps between min_size and max_size connections open. Idle
+    connections are checked with is_connected() when checked out and
+    closed once idle for more than max_idle seconds (down to min_size).
+    Connections are rolled back when released. Counters of checkouts,
+    waits, creations, failed health checks, reaped connections and
+    failed rollbacks are kept in `metrics`.
+    """
+
+    def __init__(
+            self,
+            connect: Callable[[], MySQLConnection],
+            min_size: int = 1,
+            max_size: int = 5,
+            max_idle: float = 300.0
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size.")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self._idle = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self.metrics = {
+            'checkouts': 0,
+            'waits': 0,
+            'creations': 0,
+            'health_check_failures': 0,
+            'reaped': 0,
+            'reset_failures': 0,
+        }
+        for _ in range(min_size):
+            self._size += 1
+            self._idle.append((self._create(), time.monotonic()))
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle or checked out."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """Number of idle connections."""
+        return len(self._idle)
+
+    def _create(self):
+        """Opens a new connection (the slot is already counted)."""
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.metrics['creations'] += 1
+        return connection
+
+    @staticmethod
+    def _is_healthy(connection) -> bool:
+        """Checks that a connection is still usable."""
+        is_connected = getattr(connection, 'is_connected', None)
+        if is_connected is None:
+            return True
+        try:
+            return bool(is_connected())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(connection) -> None:
+        """Closes a connection, ignoring errors."""
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _reap(self) -> None:
+        """Closes connections idle for too long. Caller holds the lock."""
+        deadline = time.monotonic() - self.max_idle
+        while (self._idle and self._size > self.min_size and
+               self._idle[0][1] < deadline):
+            connection, _ = self._idle.popleft()
+            self._discard(connection)
+            self._size -= 1
+            self.metrics['reaped'] += 1
+
+    def get(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Checks out a connection, opening one if none is idle and the
+        pool isn't full, else waiting for one to be released.
+
+        Raises:
+            TimeoutError: No connection became available in time.
+        """
+        with self._cond:
+            while True:
+                self._reap()
+                while self._idle:
+                    # Most recently used first: likeliest to be alive
+                    connection, _ = self._idle.pop()
+                    if self._is_healthy(connection):
+                        self.metrics['checkouts'] += 1
+                        return PooledConnection(self, connection)
+                    self.metrics['health_check_failures'] += 1
+                    self._discard(connection)
+                    self._size -= 1
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                self.metrics['waits'] += 1
+                if not self._cond.wait(timeout):
+                    raise TimeoutError("No database connection available.")
+
+        connection = self._create()
+        with self._cond:
+            self.metrics['checkouts'] += 1
+        return PooledConnection(self, connection)
+
+    def release(self, connection) -> None:
+        """
+        Gives a checked out connection back to the pool, rolled back so
+        the next borrower doesn't inherit an open transaction or
+        snapshot. Connections that fail the rollback are closed.
+        """
+        try:
+            connection.rollback()
+        except Exception:
+            self._discard(connection)
+            with self._cond:
+                self._size -= 1
+                self.metrics['reset_failures'] += 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((connection, time.monotonic()))
+            self._reap()
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Closes every idle connection."""
+        with self._cond:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+                self._size -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_db_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool, created on first use.
+
+    Connections use the same PERSONAL_DATA_DB_* variables as get_db();
+    PERSONAL_DATA_DB_POOL_MIN (default 1), PERSONAL_DATA_DB_POOL_MAX
+    (default 5) and PERSONAL_DATA_DB_POOL_MAX_IDLE (seconds, default
+    300) size the pool.
+
+    Returns:
+        ConnectionPool: The pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                get_db,
+                min_size=int(os.getenv('PERSONAL_DATA_DB_POOL_MIN', '1')),
+                max_size=int(os.getenv('PERSONAL_DATA_DB_POOL_MAX', '5')),
+                max_idle=float(
+                    os.getenv('PERSONAL_DATA_DB_POOL_MAX_IDLE', '300'))
+            )
+        return _pool
+
+
+def get_pooled_db() -> PooledConnection:
+    """
+    Pooled variant of get_db(): close() returns the connection to the
+    pool instead of closing it.
+
+    Returns:
+        PooledConnection: Connection object to interact with the database.
+    """
+    return get_db_pool().get()
+
+
+def format_user(user) -> str:
+    """
+    Builds the log message of one row of the users table.
+
+    Args:
+        user: Row addressable by column name.
+
+    Returns:
+        str: The message, before redaction.
+    """
+    return (
+        f"name={user['name']}; "
+        f"email={user['email']}; "
+        f"phone={user['phone']}; "
+        f"ssn={user['ssn']}; "
+        f"password={user['password']}; "
+        f"ip={user['ip']}; "
+        f"last_login={user['last_login']}; "
+        f"user_agent={user['user_agent']}"
+    )
+
+
+def _dict_cursor(db):
+    """
+    Opens a cursor whose rows are addressable by column name.
+
+    MySQL connections get an unbuffered (server-side) dictionary
+    cursor, so rows stay on the server until fetched; sqlite3
+    connections, used as a local stand-in, get sqlite3.Row rows.
+    """
+    if isinstance(db, sqlite3.Connection):
+        cursor = db.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor
+    return db.cursor(dictionary=True, buffered=False)
+
+
+def _redact_batch(
+        seq: int,
+        logger_name: str,
+        messages: List[str]
+) -> Tuple[int, int, str]:
+    """
+    Worker process side of a parallel export: formats one batch of
+    messages the way the logger's RedactingFormatter would.
+
+    Returns:
+        tuple: seq, the number of messages and the formatted lines,
+        newline terminated.
+    """
+    formatter = RedactingFormatter(fields=PII_FIELDS)
+    lines = []
+    for message in messages:
+        record = logging.LogRecord(logger_name, logging.INFO, __file__, 0,
+                                   message, None, None)
+        lines.append(formatter.format(record) + "\n")
+    return seq, len(messages), ''.join(lines)
+
+
+def _write_formatted(logger: logging.Logger, text: str) -> None:
+    """Writes already formatted lines to the logger's stream handlers."""
+    handlers = [handler for handler in logger.handlers
+                if isinstance(handler, logging.StreamHandler)]
+    if not handlers:
+        sys.stderr.write(text)
+        return
+    for handler in handlers:
+        with handler.lock:
+            handler.stream.write(text)
+            handler.flush()
+
+
+def export_users(
+        db,
+        logger: logging.Logger,
+        batch_size: int = 1000,
+        progress: Optional[Callable[[dict], None]] = None,
+        workers: int = 1
+) -> dict:
+    """
+    Logs every row of the users table, fetching batch_size rows at a
+    time so memory use doesn't depend on the size of the table.
+
+    With workers > 1, each batch is redacted and formatted in a pool of
+    worker processes; batches carry a sequence number and are written
+    in order, with at most 2 batches per worker in flight.
+
+    Args:
+        db: MySQL or sqlite3 connection.
+        logger (logging.Logger): Logger redacting the messages.
+        batch_size (int): Rows fetched per round trip.
+        progress (callable): Called after each batch with the
+        running stats.
+        workers (int): Worker processes redacting the rows.
+
+    Returns:
+        dict: rows exported, seconds elapsed and rows_per_sec.
+    """
+    stats = {'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+    start = time.perf_counter()
+
+    def batch_done(count: int):
+        """Updates the stats once count rows are written."""
+        stats['rows'] += count
+        stats['seconds'] = time.perf_counter() - start
+        stats['rows_per_sec'] = stats['rows'] / stats['seconds']
+        if progress is not None:
+            progress(stats)
+
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    pending = set()
+    finished = {}
+    next_seq = 0
+
+    def collect(futures):
+        """Writes the finished batches that are next in sequence."""
+        nonlocal next_seq
+        for future in futures:
+            seq, count, text = future.result()
+            finished[seq] = (count, text)
+        while next_seq in finished:
+            count, text = finished.pop(next_seq)
+            _write_formatted(logger, text)
+            batch_done(count)
+            next_seq += 1
+
+    cursor = _dict_cursor(db)
+    try:
+        cursor.execute("SELECT * FROM users")
+        seq = 0
+        while True:
+            users = cursor.fetchmany(batch_size)
+            if not users:
+                break
+            if pool is None:
+                for user in users:
+                    logger.info(format_user(user))
+                batch_done(len(users))
+                continue
+            messages = [format_user(user) for user in users]
+            pending.add(pool.submit(_redact_batch, seq, logger.name,
+                                    messages))
+            seq += 1
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(pending)[0])
+    finally:
+        cursor.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    stats['seconds'] = time.perf_counter() - start
+    if stats['seconds'] > 0:
+        stats['rows_per_sec'] = stats['rows'] / stats['seconds']
+    return stats
+
+
+def _print_progress(stats: dict) -> None:
+    """Writes export progress to stderr."""
+    print("exported {rows} rows ({rows_per_sec:.0f} rows/sec)".format(
+        **stats), file=sys.stderr)
+
+
 def main():
     """
     Main function to retrieve all users from the database
     and display their information with sensitive
     fields redacted.
+
+    PERSONAL_DATA_EXPORT_BATCH_SIZE sets the rows fetched at a time
+    (default 1000); PERSONAL_DATA_EXPORT_WORKERS the processes
+    redacting them (default 1, in-process); and
+    PERSONAL_DATA_EXPORT_PROGRESS=1 reports progress on stderr.
     """
     logger = get_logger()
     db = get_db()
 
-    cursor = db.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM users")
-    users = cursor.fetchall()
-
-    for user in users:
-        # Constructing log message for each user with redacted data
-        log_message = (
-            f"name={user['name']}; "
-            f"email={user['email']}; "
-            f"phone={user['phone']}; "
-            f"ssn={user['ssn']}; "
-            f"password={user['password']}; "
-            f"ip={user['ip']}; "
-            f"last_login={user['last_login']}; "
-            f"user_agent={user['user_agent']}"
-        )
-        logger.info(log_message)
+    batch_size = int(os.getenv('PERSONAL_DATA_EXPORT_BATCH_SIZE', '1000'))
+    progress = None
+    if os.getenv('PERSONAL_DATA_EXPORT_PROGRESS') == '1':
+        progress = _print_progress
+    workers = int(os.getenv('PERSONAL_DATA_EXPORT_WORKERS', '1'))
+    export_users(db, logger, batch_size, progress, workers)
 
-    cursor.close()
     db.close()
 
 
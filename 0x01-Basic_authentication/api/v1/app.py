@@ -7,8 +7,12 @@ from api.v1.views import app_views
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
 import os
-from api.v1.auth.auth import Auth
+import time
+from api.v1.auth.auth import Auth, ExcludedPaths
 from api.v1.auth.basic_auth import BasicAuth
+from api.v1.metrics import (METRICS_ENABLED, REQUEST_METRIC, histogram,
+                            instrument, instrument_classmethod)
+from models.base import Base
 
 
 app = Flask(__name__)
@@ -26,6 +30,17 @@ else:
     auth = Auth()
 
 
+# Routes that don't require authentication, compiled once at startup.
+# AUTH_EXCLUDED_PATHS adds comma-separated entries ('*' wildcards allowed)
+EXCLUDED_PATHS = ExcludedPaths([
+    '/api/v1/status/',
+    '/api/v1/unauthorized/',
+    '/api/v1/forbidden/',
+    '/api/v1/metrics/',
+] + [p.strip() for p in getenv("AUTH_EXCLUDED_PATHS", "").split(",")
+     if p.strip()])
+
+
 @app.errorhandler(404)
 def not_found(error) -> str:
     """ Not found handler
@@ -47,24 +62,47 @@ def unauthorized(error) -> str:
     return jsonify({"error": "Forbidden"}), 403
 
 
+# Model writes are timed from here so the models don't depend on the API
+instrument_classmethod(Base, 'save_to_file', 'model_save_to_file')
+instrument_classmethod(Base, '_append_to_journal', 'model_journal_append')
+
+
+def start_request_timer():
+    """ Note when the request started, ahead of authentication
+    """
+    request.started_at = time.perf_counter()
+
+
+def record_request_time(response):
+    """ Add the time taken by the request to its histogram
+    """
+    started_at = getattr(request, 'started_at', None)
+    if started_at is not None:
+        rule = request.url_rule
+        histogram(REQUEST_METRIC, method=request.method,
+                  endpoint=rule.rule if rule is not None else 'unmatched',
+                  status=response.status_code).observe(
+                      time.perf_counter() - started_at)
+    return response
+
+
+if METRICS_ENABLED:
+    app.before_request(start_request_timer)
+    app.after_request(record_request_time)
+
+
 @app.before_request
+@instrument('before_request')
 def before_request_handler():
     """Handler to proess request before they reach the route.
     """
     if auth is None:
         return
 
-    """list of routes that doesnt require authentication"""
-    excluded_paths = [
-        '/api/v1/status/',
-        '/api/v1/unauthorized/',
-        '/api/v1/forbidden/'
-    ]
-
     """check if the current request path requires
     authentication
     """
-    if not auth.require_auth(request.path, excluded_paths):
+    if not auth.require_auth(request.path, EXCLUDED_PATHS):
         return
 
     """if authorization header is missing, return a 401 error
@@ -2,19 +2,106 @@
 """ Authentication module for the API.
 """
 from flask import request
-from typing import List, TypeVar
+from functools import lru_cache
+from typing import List, Optional, TypeVar, Union
+
+
+class ExcludedPaths:
+    """Excluded paths compiled once into an exact-match set and a
+    prefix trie for the wildcard ('*') entries.
+    """
+
+    _END = None
+
+    def __init__(self, excluded_paths: List[str]):
+        """Compiles excluded_paths.
+
+        Args:
+            excluded_paths (List[str]): Paths that don't require
+            authentication. Entries ending with '*' match any path
+            starting with the rest of the entry; other entries match
+            the path with or without a trailing slash.
+        """
+        self._exact = set()
+        self._trie = {}
+        for excluded_path in excluded_paths:
+            if excluded_path.endswith('*'):
+                node = self._trie
+                for char in excluded_path[:-1]:
+                    node = node.setdefault(char, {})
+                node[self._END] = True
+            elif excluded_path.endswith('/'):
+                self._exact.add(excluded_path)
+            else:
+                self._exact.add(excluded_path + '/')
+
+    def __len__(self) -> int:
+        """Number of compiled entries."""
+        return len(self._exact) + (1 if self._trie else 0)
+
+    def match(self, path: str) -> bool:
+        """Checks if path is excluded, in O(len(path)).
+
+        Args:
+            path (str): The path to check.
+
+        Returns:
+            bool: True if path matches an excluded entry.
+        """
+        normalized_path = path if path.endswith('/') else path + '/'
+        if normalized_path in self._exact:
+            return True
+
+        node = self._trie
+        if self._END in node:
+            return True
+        for char in normalized_path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+
+@lru_cache(maxsize=32)
+def _compile_excluded_paths(excluded_paths: tuple) -> ExcludedPaths:
+    """Compiles and memoizes a tuple of excluded paths."""
+    return ExcludedPaths(excluded_paths)
+
+
+class AuthContext:
+    """Credentials of one request, read from its headers once and
+    shared by the Auth classes until the request ends.
+    """
+
+    __slots__ = ('authorization', 'user', 'resolved')
+
+    def __init__(self, request):
+        """Reads the credentials carried by request.
+
+        Args:
+            request (Flask request): The request object.
+        """
+        self.authorization = request.headers.get('Authorization')
+        # Set by Auth.current_user once the request is resolved
+        self.user = None
+        self.resolved = False
 
 
 class Auth:
     """Auth class to manage API authentication."""
 
-    def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
+    def require_auth(
+            self, path: str,
+            excluded_paths: Union[List[str], ExcludedPaths]) -> bool:
         """Determines if a path requires authentication.
 
         Args:
             path (str): The path to check.
             excluded_paths (List[str]): List of paths that
-            don't require authentication.
+            don't require authentication, or an ExcludedPaths
+            compiled from it.
 
         Returns:
             bool: True if authentication is required, False otherwise.
@@ -24,27 +111,32 @@ class Auth:
         if excluded_paths is None or not excluded_paths:
             return True
 
-        # Normalize path by ensuring it ends with a slash for comparison
-        normalized_path = path if path.endswith('/') else path + '/'
+        # Lists are compiled once and reused on the following calls
+        if not isinstance(excluded_paths, ExcludedPaths):
+            excluded_paths = _compile_excluded_paths(tuple(excluded_paths))
 
-        for excluded_path in excluded_paths:
-            """ Handles the wildcard paths that ends with '*'
-            """
-            if excluded_path.endswith('*'):
-                base_path = excluded_path[:-1]
-                if normalized_path.startswith(base_path):
-                    return False
+        return not excluded_paths.match(path)
 
-            # Extract match check for paths ending with '/'
-            elif excluded_path.endswith('/'):
-                if normalized_path == excluded_path:
-                    return False
+    def context(self, request=None) -> Optional[AuthContext]:
+        """Returns the AuthContext of a request, built on first use.
 
-            # Extract match check for paths not ending with '/'
-            elif normalized_path == excluded_path + '/':
-                return False
+        Args:
+            request (Flask request): The request object.
 
-        return True
+        Returns:
+            AuthContext: The context stored on the request, or None if
+            there is no request.
+        """
+        if request is None:
+            return None
+        context = getattr(request, 'auth_context', None)
+        if context is None:
+            context = AuthContext(request)
+            try:
+                request.auth_context = context
+            except AttributeError:
+                pass
+        return context
 
     def authorization_header(self, request=None) -> str:
         """Retrieves the authorization header from the request.
@@ -53,18 +145,34 @@ class Auth:
             request (Flask request): The request object.
 
         Returns:
-            str: None, as this is just a template for now.
+            str: The header value, or None if it is missing.
         """
-        if request is None or 'Authorization' not in request.headers:
-            return None
-        return request.headers.get('Authorization')
+        context = self.context(request)
+        return None if context is None else context.authorization
 
     def current_user(self, request=None) -> TypeVar('User'):
-        """Retrieves the current user.
+        """Retrieves the current user, resolving it once per request.
 
         Args:
             request (Flask request): The request object.
 
+        Returns:
+            TypeVar('User'): The authenticated user, or None.
+        """
+        context = self.context(request)
+        if context is None:
+            return None
+        if not context.resolved:
+            context.user = self.resolve_user(context)
+            context.resolved = True
+        return context.user
+
+    def resolve_user(self, context: AuthContext) -> TypeVar('User'):
+        """Finds the user authenticated by the credentials of context.
+
+        Args:
+            context (AuthContext): The credentials of the request.
+
         Returns:
             TypeVar('User'): None, as this is just a template for now.
         """
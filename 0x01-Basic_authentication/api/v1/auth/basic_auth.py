@@ -1,14 +1,25 @@
 #!/usr/bin/env python3
 """ Basic authentication module for the API. """
 
-from api.v1.auth.auth import Auth
+from api.v1.auth.auth import Auth, AuthContext
+from api.v1.auth.cache import TTLCache
+from api.v1.metrics import instrument, timed
 import base64
+import hashlib
+from os import getenv
 from typing import TypeVar
 from models.user import User
 
 
 class BasicAuth(Auth):
     """BasicAuth class that inherits from Auth."""
+
+    # Digest of an already verified Authorization header ->
+    # (user id, email, password hash) it resolved to
+    credentials_cache = TTLCache(
+        maxsize=int(getenv("BASIC_AUTH_CACHE_SIZE", "1024")),
+        ttl=float(getenv("BASIC_AUTH_CACHE_TTL", "60")))
+
     def extract_base64_authorization_header(
             self, authorization_header: str) -> str:
         """Extracts the Base64 part of the Authorization header."""
@@ -19,6 +30,7 @@ class BasicAuth(Auth):
             return None
         return authorization_header[6:]
 
+    @instrument('basic_auth_decode')
     def decode_base64_authorization_header(
             self, base64_authorization_header: str) -> str:
         """
@@ -84,24 +96,43 @@ class BasicAuth(Auth):
 
         """ Search for user by email using User.search
         """
-        users = User.search({"email": user_email})
+        with timed('basic_auth_search'):
+            users = User.search({"email": user_email})
 
         """ Check if a user was found and validate the password
         """
         if users:
             user = users[0]
-            if user.is_valid_password(user_pwd):
+            with timed('basic_auth_password'):
+                valid = user.is_valid_password(user_pwd)
+            if valid:
                 return user
 
         # Return None if no valid user was found
         return None
 
-    def current_user(self, request=None) -> TypeVar('User'):
-        """ Step 1: Extract Authorization header"""
-        auth_header = self.authorization_header(request)
+    @instrument('basic_auth_resolve')
+    def resolve_user(self, context: AuthContext) -> TypeVar('User'):
+        """ Step 1: Take the Authorization header read into the context
+        """
+        auth_header = context.authorization
         if auth_header is None:
             return None
 
+        """ Repeated header: reuse the user it was verified for, as long
+        as that user still exists with the same email and password
+        """
+        with timed('basic_auth_digest'):
+            cache_key = hashlib.sha256(auth_header.encode()).digest()
+        cached = self.credentials_cache.get(cache_key)
+        if cached is not None:
+            user_id, user_email, password_hash = cached
+            user = User.get(user_id)
+            if (user is not None and user.email == user_email and
+                    user.password == password_hash):
+                return user
+            self.credentials_cache.pop(cache_key)
+
         """ Step 2: Extract Base64 part from the header"""
         base64_auth = self.extract_base64_authorization_header(auth_header)
         if base64_auth is None:
@@ -120,4 +151,7 @@ class BasicAuth(Auth):
         """ Step 5: Retrieve User object using email and password
         """
         user = self.user_object_from_credentials(user_email, user_pwd)
+        if user is not None:
+            self.credentials_cache.set(
+                cache_key, (user.id, user.email, user.password))
         return user
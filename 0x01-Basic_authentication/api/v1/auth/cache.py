@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+""" In-process caches used by the authentication classes.
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire ttl seconds after being set.
+
+    When full, the least recently used entry is evicted. A ttl or
+    maxsize of 0 disables the cache.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        """Initializes an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries.
+            ttl (float): Lifetime of an entry, in seconds.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of entries, expired ones included."""
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Returns the live value stored under key, or default."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        """Stores value under key for ttl seconds."""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Removes key and returns its value, expired or not."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        """Removes every entry."""
+        with self._lock:
+            self._entries.clear()
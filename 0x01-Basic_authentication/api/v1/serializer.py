@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+""" JSON encoding of API responses
+"""
+from api.v1.metrics import instrument
+from flask import current_app, jsonify
+from os import getenv
+import json
+
+
+# API_JSON_ENCODER=orjson switches to orjson when it is installed.
+# Its output matches jsonify's except that non-ASCII characters are
+# written as UTF-8 instead of \u escapes
+JSON_ENCODER = getenv("API_JSON_ENCODER", "json")
+
+_orjson = None
+if JSON_ENCODER == "orjson":
+    try:
+        import orjson as _orjson
+    except ImportError:
+        _orjson = None
+
+
+@instrument('json_dumps')
+def dumps(data) -> str:
+    """ Encode data as compact JSON text
+    """
+    if _orjson is not None:
+        return _orjson.dumps(data, option=_orjson.OPT_SORT_KEYS).decode()
+    return json.dumps(data, separators=(',', ':'), sort_keys=True)
+
+
+@instrument('json_response')
+def json_response(data, status: int = 200):
+    """ Build a JSON response: jsonify() by default, or the fast
+    encoder selected by API_JSON_ENCODER
+    """
+    if _orjson is None:
+        response = jsonify(data)
+        response.status_code = status
+        return response
+    body = _orjson.dumps(
+        data, option=_orjson.OPT_SORT_KEYS | _orjson.OPT_APPEND_NEWLINE)
+    return current_app.response_class(
+        body, status=status, mimetype='application/json')
@@ -2,18 +2,71 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import Response, abort, jsonify, request
+from api.v1.serializer import dumps, json_response
 from models.user import User
 
 
+# Users read per step while streaming GET /api/v1/users?stream=1
+STREAM_PAGE_SIZE = 100
+
+
+def stream_users(after: str = None, limit: int = None):
+    """ Yield a JSON array of users ordered by ID, one page at a time
+    """
+    yield '['
+    first = True
+    while limit is None or limit > 0:
+        size = STREAM_PAGE_SIZE if limit is None \
+            else min(limit, STREAM_PAGE_SIZE)
+        users = User.page(after, size)
+        for user in users:
+            yield ('' if first else ',') + dumps(user.to_json())
+            first = False
+        if len(users) < size:
+            break
+        after = users[-1].id
+        if limit is not None:
+            limit -= len(users)
+    yield ']'
+
+
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters (all optional):
+      - limit: maximum number of users to return
+      - after: ID of the last user of the previous page
+      - stream: 1 to send the JSON array in chunks
     Return:
-      - list of all User objects JSON represented
+      - list of all User objects JSON represented; with limit/after,
+      one page ordered by ID, with the cursor of the next page in the
+      X-Next-Cursor header when there may be more
+      - 400 if limit isn't a positive integer
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    after = request.args.get('after')
+    limit = request.args.get('limit')
+    stream = request.args.get('stream') == '1'
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return jsonify({'error': "limit must be a positive integer"}), 400
+
+    if stream:
+        return Response(stream_users(after, limit),
+                        mimetype='application/json')
+    if after is None and limit is None:
+        all_users = [user.to_json() for user in User.all()]
+        return json_response(all_users)
+
+    users = User.page(after, limit)
+    response = json_response([user.to_json() for user in users])
+    if limit is not None and len(users) == limit:
+        response.headers['X-Next-Cursor'] = users[-1].id
+    return response
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -30,7 +83,7 @@ def view_one_user(user_id: str = None) -> str:
     user = User.get(user_id)
     if user is None:
         abort(404)
-    return jsonify(user.to_json())
+    return json_response(user.to_json())
 
 
 @app_views.route('/users/<user_id>', methods=['DELETE'], strict_slashes=False)
@@ -83,7 +136,7 @@ def create_user() -> str:
             user.first_name = rj.get("first_name")
             user.last_name = rj.get("last_name")
             user.save()
-            return jsonify(user.to_json()), 201
+            return json_response(user.to_json(), 201)
         except Exception as e:
             error_msg = "Can't create User: {}".format(e)
     return jsonify({'error': error_msg}), 400
@@ -119,4 +172,4 @@ def update_user(user_id: str = None) -> str:
     if rj.get('last_name') is not None:
         user.last_name = rj.get('last_name')
     user.save()
-    return jsonify(user.to_json()), 200
+    return json_response(user.to_json(), 200)
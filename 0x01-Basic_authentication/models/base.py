@@ -1,21 +1,200 @@
 #!/usr/bin/env python3
 """ Base module
 """
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from typing import TypeVar, List, Iterable, Tuple
+from os import getenv, path
 import json
+import os
+import threading
+import time
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+# Per class, IDs of all objects in sorted order (stable pagination)
+SORTED_IDS = {}
+
+# Journaled persistence: mutations are appended to .db_<Class>.log and
+# the .db_<Class>.json snapshot is only rewritten on compaction
+JOURNAL_MODE = getenv("MODELS_JOURNAL", "0") == "1"
+JOURNAL_COMPACT_THRESHOLD = int(getenv("MODELS_JOURNAL_COMPACT_THRESHOLD",
+                                       "1000"))
+JOURNAL_SIZES = {}
+
+# Lazy mode: DATA keeps each record as its compact JSON text and
+# instances are only built on access, with at most MODELS_CACHE_SIZE of
+# them kept per class
+LAZY_LOAD = getenv("MODELS_LAZY_LOAD", "0") == "1"
+CACHE_SIZE = int(getenv("MODELS_CACHE_SIZE", "10000"))
+CACHE = {}
+
+# Per class lock guarding the shared per-class state (stored objects,
+# LRU cache, secondary indexes, sorted IDs, journal) against concurrent
+# requests
+LOCKS = {}
+
+# Throughput of the last load_from_file() per class
+LOAD_STATS = {}
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """ Parse a TIMESTAMP_FORMAT string, skipping strptime when the
+    value has the canonical zero-padded layout
+    """
+    if len(value) == 19 and value[10] == 'T':
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+def _format_timestamp(value: datetime) -> str:
+    """ Format a datetime as TIMESTAMP_FORMAT, skipping strftime for
+    naive datetimes with four-digit years, where isoformat gives the
+    same text
+    """
+    if value.tzinfo is None and value.year >= 1000:
+        return value.isoformat(timespec='seconds')
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+class _SnapshotReader():
+    """ Incremental reader of a {id: object} JSON snapshot: yields one
+    (id, object) pair at a time instead of decoding the whole file
+    """
+
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        """ Initialize a reader over the text file f
+        """
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """ Read one more chunk, return False at end of file
+        """
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """ Skip whitespace and return the next character
+        """
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                raise ValueError("Truncated snapshot")
+
+    def _expect(self, chars: str) -> str:
+        """ Consume the next character, which must be one of chars
+        """
+        c = self._peek()
+        if c not in chars:
+            raise ValueError("Unexpected {!r} in snapshot".format(c))
+        self._pos += 1
+        return c
+
+    def _value(self):
+        """ Decode the next JSON value, reading more input as needed
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def __iter__(self):
+        """ Iterate over the (id, object) pairs of the snapshot
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            yield key, self._value()
+            if self._expect(',}') == '}':
+                return
+
+
+class _Index():
+    """ Secondary index: attribute value -> IDs of the matching objects
+    """
+
+    def __init__(self):
+        """ Initialize an empty index
+        """
+        self._ids_by_value = {}
+        self._value_by_id = {}
+
+    def add(self, obj_id: str, value) -> None:
+        """ Index obj_id under value, replacing any previous entry
+        """
+        self.discard(obj_id)
+        try:
+            ids = self._ids_by_value.setdefault(value, {})
+        except TypeError:
+            return
+        ids[obj_id] = None
+        self._value_by_id[obj_id] = value
+
+    def discard(self, obj_id: str) -> None:
+        """ Remove obj_id from the index
+        """
+        if obj_id not in self._value_by_id:
+            return
+        value = self._value_by_id.pop(obj_id)
+        ids = self._ids_by_value.get(value)
+        if ids is not None:
+            ids.pop(obj_id, None)
+            if len(ids) == 0:
+                del self._ids_by_value[value]
+
+    def lookup(self, value) -> List[str]:
+        """ Return IDs indexed under value, or None if value can't be indexed
+        """
+        try:
+            return list(self._ids_by_value.get(value, {}))
+        except TypeError:
+            return None
 
 
 class Base():
     """ Base class
     """
 
+    # Persisted attributes live in slots instead of a per-instance dict
+    __slots__ = ('id', 'created_at', 'updated_at')
+
+    # Attributes with a secondary index used by search()
+    search_indexes: Tuple[str, ...] = ()
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
@@ -25,13 +204,11 @@ class Base():
 
         self.id = kwargs.get('id', str(uuid.uuid4()))
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            self.created_at = _parse_timestamp(kwargs.get('created_at'))
         else:
             self.created_at = datetime.utcnow()
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            self.updated_at = _parse_timestamp(kwargs.get('updated_at'))
         else:
             self.updated_at = datetime.utcnow()
 
@@ -48,15 +225,40 @@ class Base():
         """ Convert the object a JSON dictionary
         """
         result = {}
-        for key, value in self.__dict__.items():
-            if not for_serialization and key[0] == '_':
+        for key, public in self.__class__._json_plan():
+            if not (public or for_serialization):
+                continue
+            try:
+                value = getattr(self, key)
+            except AttributeError:
                 continue
             if type(value) is datetime:
-                result[key] = value.strftime(TIMESTAMP_FORMAT)
+                result[key] = _format_timestamp(value)
             else:
                 result[key] = value
+        if hasattr(self, '__dict__'):
+            for key, value in self.__dict__.items():
+                if not for_serialization and key[0] == '_':
+                    continue
+                if type(value) is datetime:
+                    result[key] = _format_timestamp(value)
+                else:
+                    result[key] = value
         return result
 
+    @classmethod
+    def _json_plan(cls) -> Tuple[Tuple[str, bool], ...]:
+        """ Return the (slot name, public) pairs serialized by to_json,
+        base classes first, computed once per class
+        """
+        plan = cls.__dict__.get('_json_plan_cache')
+        if plan is None:
+            plan = tuple((name, name[0] != '_')
+                         for klass in reversed(cls.__mro__)
+                         for name in klass.__dict__.get('__slots__', ()))
+            cls._json_plan_cache = plan
+        return plan
+
     @classmethod
     def load_from_file(cls):
         """ Load all objects from file
@@ -64,13 +266,25 @@ class Base():
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
         DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
-
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+        CACHE[s_class] = OrderedDict()
+        JOURNAL_SIZES[s_class] = 0
+        cls._reset_indexes()
+        start = time.perf_counter()
+        if path.exists(file_path):
+            with open(file_path, 'r') as f:
+                for obj_id, obj_json in _SnapshotReader(f):
+                    cls._store_record(obj_id, obj_json, bulk=True)
+        cls._replay_journal()
+        # Sorted once here rather than kept sorted record by record
+        with cls._lock():
+            SORTED_IDS[s_class] = sorted(DATA[s_class])
+        elapsed = time.perf_counter() - start
+        count = len(DATA[s_class])
+        LOAD_STATS[s_class] = {
+            'objects': count,
+            'seconds': elapsed,
+            'objects_per_sec': count / elapsed if elapsed > 0 else 0.0,
+        }
 
     @classmethod
     def save_to_file(cls):
@@ -78,28 +292,261 @@ class Base():
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+        # Write aside and rename so a crash never leaves a truncated
+        # snapshot; records are written one at a time, with the layout
+        # json.dump() gives the whole {id: object} mapping
+        tmp_path = "{}.tmp".format(file_path)
+        with cls._lock():
+            with open(tmp_path, 'w') as f:
+                f.write('{')
+                separator = ''
+                for obj_id, obj in DATA[s_class].items():
+                    if type(obj) is not str:
+                        obj = json.dumps(obj.to_json(True))
+                    f.write('{}{}: {}'.format(separator, json.dumps(obj_id),
+                                              obj))
+                    separator = ', '
+                f.write('}')
+            os.replace(tmp_path, file_path)
+
+            # The snapshot holds every journaled mutation: drop the
+            # journal so it isn't replayed over the snapshot on the next
+            # load
+            journal_path = ".db_{}.log".format(s_class)
+            if path.exists(journal_path):
+                os.remove(journal_path)
+            JOURNAL_SIZES[s_class] = 0
+
+    @classmethod
+    def _replay_journal(cls):
+        """ Apply the journal records on top of the loaded snapshot
+        """
+        s_class = cls.__name__
+        journal_path = ".db_{}.log".format(s_class)
+        if not path.exists(journal_path):
+            return
+
+        # Offset just past the last complete record
+        good_end = 0
+        with open(journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write at the tail of the journal
+                    break
+                good_end += len(line)
+                obj_id = record.get('id')
+                if record.get('op') == 'save':
+                    cls._store_record(obj_id, record.get('obj'), bulk=True)
+                elif DATA[s_class].pop(obj_id, None) is not None:
+                    cls._drop_from_cache(obj_id)
+                    cls._unindex_id(obj_id)
+                JOURNAL_SIZES[s_class] += 1
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+
+        # Cut a torn tail and terminate the last record, so the next
+        # append starts on a line of its own
+        if good_end < size or (size > 0 and not line.endswith(b"\n")):
+            with open(journal_path, 'r+b') as f:
+                f.truncate(good_end)
+                if good_end > 0:
+                    f.seek(good_end - 1)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+
+    @classmethod
+    def _append_to_journal(cls, record: dict):
+        """ Append one mutation record to the journal, compacting it
+        into the snapshot once it grows past the threshold
+        """
+        s_class = cls.__name__
+        journal_path = ".db_{}.log".format(s_class)
+        with cls._lock():
+            with open(journal_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+            JOURNAL_SIZES[s_class] = JOURNAL_SIZES.get(s_class, 0) + 1
+            if JOURNAL_SIZES[s_class] >= JOURNAL_COMPACT_THRESHOLD:
+                cls.compact()
+
+    @classmethod
+    def compact(cls):
+        """ Rewrite the snapshot and truncate the journal
+        """
+        cls.save_to_file()
+
+    @classmethod
+    def _store_record(cls, obj_id: str, obj_json: dict, bulk: bool = False):
+        """ Store one loaded record, as an instance or as JSON text in
+        lazy mode. In bulk mode the sorted IDs are left for the caller
+        to rebuild once all records are stored
+        """
+        s_class = cls.__name__
+        cls._drop_from_cache(obj_id)
+        if LAZY_LOAD:
+            DATA[s_class][obj_id] = json.dumps(obj_json)
+            with cls._lock():
+                for attr, index in cls._indexes().items():
+                    index.add(obj_id, obj_json.get(attr))
+                if not bulk:
+                    cls._add_sorted_id(obj_id)
+        else:
+            obj = cls(**obj_json)
+            DATA[s_class][obj_id] = obj
+            obj._index(bulk)
+
+    @classmethod
+    def _materialize(cls, obj_id: str) -> TypeVar('Base'):
+        """ Return the instance stored under obj_id, building it from
+        its JSON text (and caching it) in lazy mode
+        """
+        s_class = cls.__name__
+        value = DATA[s_class].get(obj_id)
+        if type(value) is not str:
+            return value
+        with cls._lock():
+            cache = CACHE.setdefault(s_class, OrderedDict())
+            obj = cache.get(obj_id)
+            if obj is not None:
+                cache.move_to_end(obj_id)
+                return obj
+        obj = cls(**json.loads(value))
+        return obj._cache(replace=False)
+
+    @classmethod
+    def _lock(cls) -> threading.RLock:
+        """ Return the lock of the class, created on first use
+        """
+        lock = LOCKS.get(cls.__name__)
+        if lock is None:
+            lock = LOCKS.setdefault(cls.__name__, threading.RLock())
+        return lock
+
+    def _cache(self, replace: bool = True) -> TypeVar('Base'):
+        """ Put the current object in the LRU cache of its class and
+        return the cached instance; without replace, an instance another
+        thread cached first under the same ID is kept
+        """
+        s_class = self.__class__.__name__
+        with self.__class__._lock():
+            cache = CACHE.setdefault(s_class, OrderedDict())
+            if replace:
+                cache[self.id] = self
+            obj = cache.setdefault(self.id, self)
+            cache.move_to_end(self.id)
+            while len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+        return obj
+
+    @classmethod
+    def _drop_from_cache(cls, obj_id: str):
+        """ Forget the cached instance of obj_id, if any
+        """
+        with cls._lock():
+            cache = CACHE.get(cls.__name__)
+            if cache is not None:
+                cache.pop(obj_id, None)
 
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        with self.__class__._lock():
+            if LAZY_LOAD:
+                DATA[s_class][self.id] = json.dumps(self.to_json(True))
+                self._cache()
+            else:
+                DATA[s_class][self.id] = self
+            self._index()
+            if JOURNAL_MODE:
+                self.__class__._append_to_journal({
+                    'op': 'save', 'id': self.id, 'obj': self.to_json(True)
+                })
+            else:
+                self.__class__.save_to_file()
 
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
+        with self.__class__._lock():
+            if DATA[s_class].get(self.id) is None:
+                return
             del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+            self.__class__._drop_from_cache(self.id)
+            self._unindex()
+            if JOURNAL_MODE:
+                self.__class__._append_to_journal({
+                    'op': 'remove', 'id': self.id
+                })
+            else:
+                self.__class__.save_to_file()
+
+    @classmethod
+    def _reset_indexes(cls):
+        """ Drop and recreate the secondary indexes of the class
+        """
+        with cls._lock():
+            INDEXES[cls.__name__] = {
+                attr: _Index() for attr in cls.search_indexes
+            }
+            SORTED_IDS[cls.__name__] = sorted(DATA.get(cls.__name__, {}))
+
+    @classmethod
+    def _indexes(cls) -> dict:
+        """ Return the secondary indexes of the class
+        """
+        if INDEXES.get(cls.__name__) is None:
+            cls._reset_indexes()
+        return INDEXES[cls.__name__]
+
+    def _index(self, bulk: bool = False):
+        """ Add or refresh the current object in the secondary indexes,
+        and in the sorted IDs unless bulk loading
+        """
+        with self.__class__._lock():
+            for attr, index in self.__class__._indexes().items():
+                index.add(self.id, getattr(self, attr, None))
+            if not bulk:
+                self.__class__._add_sorted_id(self.id)
+
+    def _unindex(self):
+        """ Remove the current object from the secondary indexes
+        """
+        self.__class__._unindex_id(self.id)
+
+    @classmethod
+    def _unindex_id(cls, obj_id: str):
+        """ Remove obj_id from the secondary indexes
+        """
+        with cls._lock():
+            for index in cls._indexes().values():
+                index.discard(obj_id)
+            sorted_ids = cls._sorted_ids()
+            i = bisect_left(sorted_ids, obj_id)
+            if i < len(sorted_ids) and sorted_ids[i] == obj_id:
+                del sorted_ids[i]
+
+    @classmethod
+    def _sorted_ids(cls) -> List[str]:
+        """ Return the sorted IDs of the class
+        """
+        if SORTED_IDS.get(cls.__name__) is None:
+            cls._reset_indexes()
+        return SORTED_IDS[cls.__name__]
+
+    @classmethod
+    def _add_sorted_id(cls, obj_id: str):
+        """ Insert obj_id in the sorted IDs if it isn't there yet
+        """
+        with cls._lock():
+            sorted_ids = cls._sorted_ids()
+            i = bisect_left(sorted_ids, obj_id)
+            if i == len(sorted_ids) or sorted_ids[i] != obj_id:
+                sorted_ids.insert(i, obj_id)
 
     @classmethod
     def count(cls) -> int:
@@ -118,8 +565,20 @@ class Base():
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
-        s_class = cls.__name__
-        return DATA[s_class].get(id)
+        return cls._materialize(id)
+
+    @classmethod
+    def page(cls, after: str = None,
+             limit: int = None) -> List[TypeVar('Base')]:
+        """ Return up to limit objects ordered by ID, starting after
+        the ID after (from the first object if None)
+        """
+        with cls._lock():
+            sorted_ids = cls._sorted_ids()
+            start = 0 if after is None else bisect_right(sorted_ids, after)
+            end = len(sorted_ids) if limit is None else start + limit
+            obj_ids = sorted_ids[start:end]
+        return [cls._materialize(obj_id) for obj_id in obj_ids]
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
@@ -133,5 +592,19 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+
+        obj_ids = DATA[s_class].keys()
+        indexes = cls._indexes()
+        for k, v in attributes.items():
+            if k not in indexes:
+                continue
+            with cls._lock():
+                indexed_ids = indexes[k].lookup(v)
+            if indexed_ids is None:
+                continue
+            obj_ids = [obj_id for obj_id in indexed_ids
+                       if obj_id in DATA[s_class]]
+            break
+
+        objs = (cls._materialize(obj_id) for obj_id in obj_ids)
+        return list(filter(_search, objs))
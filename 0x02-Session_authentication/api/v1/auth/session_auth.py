@@ -1,13 +1,26 @@
 #!/usr/bin/env python3
 """ Session Authentication module """
-from api.v1.auth.auth import Auth
+from api.v1.auth.auth import Auth, AuthContext
+from api.v1.auth.cache import TTLCache
+from api.v1.auth.session_store import create_session_store
+from api.v1.metrics import instrument, timed
 from models.user import User
+from os import getenv
 import uuid
 
 
 class SessionAuth(Auth):
     """ SessionAuth class that inherits from Auth """
-    user_id_by_session_id = {}
+    # Backend picked by SESSION_STORE, see session_store.py
+    user_id_by_session_id = create_session_store()
+
+    # Session ID -> user ID of sessions resolved in the last
+    # SESSION_USER_CACHE_TTL seconds, answered without asking the store.
+    # A session ended in the store stays usable until its entry expires,
+    # so the cache is off (ttl 0) unless configured
+    user_id_cache = TTLCache(
+        maxsize=int(getenv("SESSION_USER_CACHE_SIZE", "10000")),
+        ttl=float(getenv("SESSION_USER_CACHE_TTL", "0")))
 
     def create_session(self, user_id: str = None) -> str:
         """
@@ -25,11 +38,12 @@ class SessionAuth(Auth):
         # Generate a new session ID using uuid4()
         session_id = str(uuid.uuid4())
 
-        # Store the session ID and corresponding user ID in the dictionary
-        self.user_id_by_session_id[session_id] = user_id
+        # Store the session ID and corresponding user ID
+        self.user_id_by_session_id.set(session_id, user_id)
 
         return session_id
 
+    @instrument('session_auth_store')
     def user_id_for_session_id(self, session_id: str = None) -> str:
         """
         Returns the user ID based on the session ID.
@@ -46,31 +60,37 @@ class SessionAuth(Auth):
         # Return the user ID associated with the session ID
         return self.user_id_by_session_id.get(session_id)
 
-    def current_user(self, request=None):
+    @instrument('session_auth_resolve')
+    def resolve_user(self, context: AuthContext):
         """
-        Retrieves the current User instance based on a session cookie.
+        Retrieves the User instance of the session cookie of a request.
 
         Args:
-            request: The HTTP request object (optional).
+            context (AuthContext): The credentials of the request.
 
         Returns:
             User instance corresponding to the session ID,
             or None if no valid session or user is found.
         """
-        # Get the session ID from the cookie
-        session_id = self.session_cookie(request)
+        session_id = context.session_id
 
         if not session_id:
             return None
 
         # Retrieve the user ID associated with the session ID
-        user_id = self.user_id_for_session_id(session_id)
-
-        if not user_id:
-            return None
+        user_id = self.user_id_cache.get(session_id)
+        if user_id is None:
+            user_id = self.user_id_for_session_id(session_id)
+            if not user_id:
+                return None
+            self.user_id_cache.set(session_id, user_id)
 
         # Fetch and return the User instance from the database
         try:
-            return User.get(user_id)
+            with timed('session_auth_user'):
+                user = User.get(user_id)
         except Exception:
-            return None
+            user = None
+        if user is None:
+            self.user_id_cache.pop(session_id)
+        return user
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+""" Session storage backends for SessionAuth.
+"""
+from collections import OrderedDict
+import heapq
+import os
+import sqlite3
+import threading
+import time
+
+
+class SessionStore:
+    """Interface of a session ID -> user ID store.
+
+    Stores also support the dict operations SessionAuth historically
+    used on user_id_by_session_id (item assignment, get, del, in).
+    """
+
+    def __init__(self, duration: int = 0, max_per_user: int = 0,
+                 max_sessions: int = 0):
+        """Initializes the store.
+
+        Args:
+            duration (int): Session lifetime in seconds, 0 for sessions
+            that never expire.
+            max_per_user (int): Sessions kept per user, the oldest
+            being evicted first. 0 for no limit.
+            max_sessions (int): Sessions kept in total, the oldest
+            being evicted first. 0 for no limit.
+        """
+        self.duration = duration
+        self.max_per_user = max_per_user
+        self.max_sessions = max_sessions
+        self._sweeper = None
+
+    def set(self, session_id: str, user_id: str) -> None:
+        """Stores user_id under session_id."""
+        raise NotImplementedError
+
+    def get(self, session_id: str, default=None) -> str:
+        """Returns the user ID of a live session, or default."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        """Removes a session, returns True if it existed."""
+        raise NotImplementedError
+
+    def sweep(self, batch_size: int = 100) -> int:
+        """Removes at most batch_size expired sessions.
+
+        Returns:
+            int: The number of sessions removed.
+        """
+        raise NotImplementedError
+
+    def start_sweeper(self, interval: float = 1.0,
+                      batch_size: int = 100) -> threading.Thread:
+        """Starts a daemon thread sweeping expired sessions.
+
+        The thread removes batch_size sessions at a time and only
+        sleeps interval seconds once a batch comes back short, so a
+        large backlog is drained without holding the store for long.
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return self._sweeper
+
+        def _run():
+            while True:
+                if self.sweep(batch_size) < batch_size:
+                    time.sleep(interval)
+                else:
+                    time.sleep(0)
+
+        self._sweeper = threading.Thread(
+            target=_run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+        return self._sweeper
+
+    def __setitem__(self, session_id: str, user_id: str):
+        """Same as set()."""
+        self.set(session_id, user_id)
+
+    def __delitem__(self, session_id: str):
+        """Same as delete(), raising KeyError for unknown sessions."""
+        if not self.delete(session_id):
+            raise KeyError(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        """True if session_id is a live session."""
+        return self.get(session_id) is not None
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store. Expired sessions are found through a heap
+    ordered by expiry time and removed in small batches.
+    """
+
+    # Expired sessions removed on each set()
+    SWEEP_ON_SET = 4
+
+    def __init__(self, duration: int = 0, max_per_user: int = 0,
+                 max_sessions: int = 0):
+        """Initializes an empty store."""
+        super().__init__(duration, max_per_user, max_sessions)
+        # Both kept in creation order, oldest first
+        self._sessions = {}
+        self._by_user = {}
+        self._expiries = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of stored sessions, expired ones included."""
+        return len(self._sessions)
+
+    def _remove(self, session_id: str) -> bool:
+        """Removes a session, returns True if it existed."""
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return False
+        user_sessions = self._by_user.get(entry[0])
+        if user_sessions is not None:
+            user_sessions.pop(session_id, None)
+            if len(user_sessions) == 0:
+                del self._by_user[entry[0]]
+        return True
+
+    def _sweep(self, now: float, batch_size: int) -> int:
+        """Removes at most batch_size expired sessions."""
+        removed = 0
+        expiries = self._expiries
+        while expiries and expiries[0][0] <= now and removed < batch_size:
+            expires_at, session_id = heapq.heappop(expiries)
+            entry = self._sessions.get(session_id)
+            # Skip heap entries left behind by a later set() or delete()
+            if entry is not None and entry[1] == expires_at:
+                self._remove(session_id)
+                removed += 1
+        return removed
+
+    def _compact_expiries(self) -> None:
+        """Rebuilds the heap from the live sessions once most of its
+        entries belong to sessions already evicted or deleted.
+        """
+        if len(self._expiries) > 2 * len(self._sessions):
+            self._expiries = [(entry[1], session_id) for session_id, entry
+                              in self._sessions.items()
+                              if entry[1] is not None]
+            heapq.heapify(self._expiries)
+
+    def set(self, session_id: str, user_id: str) -> None:
+        """Stores user_id under session_id, evicting the oldest
+        sessions of the user, then of the store, above the limits.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._sweep(now, self.SWEEP_ON_SET)
+            self._remove(session_id)
+
+            user_sessions = self._by_user.setdefault(user_id, OrderedDict())
+            if self.max_per_user > 0:
+                while len(user_sessions) >= self.max_per_user:
+                    self._remove(next(iter(user_sessions)))
+            if self.max_sessions > 0:
+                while len(self._sessions) >= self.max_sessions:
+                    self._remove(next(iter(self._sessions)))
+
+            expires_at = None
+            if self.duration > 0:
+                expires_at = now + self.duration
+                heapq.heappush(self._expiries, (expires_at, session_id))
+            self._sessions[session_id] = (user_id, expires_at)
+            self._by_user.setdefault(user_id, user_sessions)[session_id] = None
+            self._compact_expiries()
+
+    def get(self, session_id: str, default=None) -> str:
+        """Returns the user ID of a live session, or default."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return default
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(session_id)
+                return default
+        return entry[0]
+
+    def delete(self, session_id: str) -> bool:
+        """Removes a session, returns True if it existed."""
+        with self._lock:
+            removed = self._remove(session_id)
+            self._compact_expiries()
+            return removed
+
+    def sweep(self, batch_size: int = 100) -> int:
+        """Removes at most batch_size expired sessions."""
+        with self._lock:
+            return self._sweep(time.monotonic(), batch_size)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store kept in a local SQLite file, shared by every worker process
+    opening the same path.
+    """
+
+    def __init__(self, file_path: str, duration: int = 0,
+                 max_per_user: int = 0, max_sessions: int = 0):
+        """Opens (and creates if needed) the sessions table.
+
+        Args:
+            file_path (str): Path of the SQLite database file.
+            duration, max_per_user, max_sessions: see SessionStore.
+        """
+        super().__init__(duration, max_per_user, max_sessions)
+        self.file_path = file_path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, "
+                "user_id TEXT NOT NULL, "
+                "expires_at REAL)")
+            columns = [row[1] for row in
+                       conn.execute("PRAGMA table_info(sessions)")]
+            if 'created_at' not in columns:
+                conn.execute("ALTER TABLE sessions "
+                             "ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_user "
+                         "ON sessions (user_id, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_created "
+                         "ON sessions (created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires "
+                         "ON sessions (expires_at)")
+            # Row count kept up to date by triggers, so enforcing
+            # max_sessions doesn't count the table on every login
+            conn.execute("CREATE TABLE IF NOT EXISTS session_count ("
+                         "n INTEGER NOT NULL)")
+            if conn.execute(
+                    "SELECT COUNT(*) FROM session_count").fetchone()[0] == 0:
+                conn.execute("INSERT INTO session_count (n) "
+                             "SELECT COUNT(*) FROM sessions")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS tr_sessions_insert "
+                         "AFTER INSERT ON sessions BEGIN "
+                         "UPDATE session_count SET n = n + 1; END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS tr_sessions_delete "
+                         "AFTER DELETE ON sessions BEGIN "
+                         "UPDATE session_count SET n = n - 1; END")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns the connection of the current thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.file_path, timeout=5.0)
+            # WAL lets readers in other workers proceed during writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Rows replaced by INSERT OR REPLACE fire the delete trigger
+            conn.execute("PRAGMA recursive_triggers=ON")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        """Number of stored sessions, expired ones included."""
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM sessions").fetchone()
+        return row[0]
+
+    def set(self, session_id: str, user_id: str) -> None:
+        """Stores user_id under session_id, evicting the oldest
+        sessions of the user, then of the store, above the limits.
+        """
+        now = time.time()
+        expires_at = None
+        if self.duration > 0:
+            expires_at = now + self.duration
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions "
+                "(session_id, user_id, expires_at, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (session_id, user_id, expires_at, now))
+            if self.max_per_user > 0:
+                conn.execute(
+                    "DELETE FROM sessions WHERE rowid IN ("
+                    "SELECT rowid FROM sessions WHERE user_id = ? "
+                    "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (user_id, self.max_per_user))
+            if self.max_sessions > 0:
+                count = conn.execute(
+                    "SELECT n FROM session_count").fetchone()[0]
+                if count > self.max_sessions:
+                    conn.execute(
+                        "DELETE FROM sessions WHERE rowid IN ("
+                        "SELECT rowid FROM sessions "
+                        "ORDER BY created_at LIMIT ?)",
+                        (count - self.max_sessions,))
+
+    def get(self, session_id: str, default=None) -> str:
+        """Returns the user ID of a live session, or default."""
+        row = self._connection().execute(
+            "SELECT user_id FROM sessions WHERE session_id = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (session_id, time.time())).fetchone()
+        return default if row is None else row[0]
+
+    def delete(self, session_id: str) -> bool:
+        """Removes a session, returns True if it existed."""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def sweep(self, batch_size: int = 100) -> int:
+        """Removes at most batch_size expired sessions."""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE rowid IN ("
+                "SELECT rowid FROM sessions WHERE expires_at <= ? LIMIT ?)",
+                (time.time(), batch_size))
+        return cursor.rowcount
+
+
+def _int_env(name: str, default: int = 0) -> int:
+    """Reads an integer environment variable."""
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def create_session_store() -> SessionStore:
+    """Builds the session store selected by the environment.
+
+    SESSION_STORE: "memory" (default) or "sqlite"
+    SESSION_STORE_PATH: SQLite file, default ".db_sessions.sqlite3"
+    SESSION_DURATION: session lifetime in seconds, 0 (default) = no expiry
+    SESSION_MAX_PER_USER, SESSION_MAX_TOTAL: session caps, 0 = no limit
+    SESSION_SWEEP_INTERVAL: seconds between sweeps of expired sessions
+    by a background thread, 0 (default) = no thread
+    SESSION_SWEEP_BATCH: expired sessions removed per sweep, default 100
+    """
+    duration = _int_env("SESSION_DURATION")
+    max_per_user = _int_env("SESSION_MAX_PER_USER")
+    max_sessions = _int_env("SESSION_MAX_TOTAL")
+    if os.getenv("SESSION_STORE", "memory") == "sqlite":
+        file_path = os.getenv("SESSION_STORE_PATH", ".db_sessions.sqlite3")
+        store = SQLiteSessionStore(file_path, duration,
+                                   max_per_user, max_sessions)
+    else:
+        store = MemorySessionStore(duration, max_per_user, max_sessions)
+
+    sweep_interval = _int_env("SESSION_SWEEP_INTERVAL")
+    if duration > 0 and sweep_interval > 0:
+        store.start_sweeper(sweep_interval,
+                            _int_env("SESSION_SWEEP_BATCH", 100))
+    return store
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+""" In-process latency histograms of the API, rendered in the
+Prometheus text exposition format
+"""
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+from os import getenv
+import threading
+import time
+
+
+# API_METRICS=1 turns instrumentation on. When it is off, instrument()
+# returns functions unchanged and timed() a shared no-op context, so
+# the instrumented code runs as if it wasn't
+METRICS_ENABLED = getenv("API_METRICS", "0") == "1"
+
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_METRIC = 'api_request_duration_seconds'
+STAGE_METRIC = 'api_stage_duration_seconds'
+
+HELP = {
+    REQUEST_METRIC: 'Time to serve a request.',
+    STAGE_METRIC: 'Time spent in one stage of serving a request.',
+}
+
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    """ Counts of observed values per bucket, with their sum
+    """
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        """ Initialize an empty histogram
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """ Record one value
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> tuple:
+        """ Return (cumulative bucket counts, sum, count)
+        """
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class _Timer:
+    """ Context manager adding its elapsed time to a histogram
+    """
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Histogram):
+        """ Time into histogram
+        """
+        self.histogram = histogram
+
+    def __enter__(self):
+        """ Start the clock
+        """
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        """ Stop the clock and record the elapsed time
+        """
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(name: str, **labels) -> Histogram:
+    """ Return the histogram of name and labels, created on first use
+    """
+    key = (name, tuple(sorted(labels.items())))
+    found = _histograms.get(key)
+    if found is None:
+        with _histograms_lock:
+            found = _histograms.setdefault(key, Histogram())
+    return found
+
+
+def timed(stage: str):
+    """ Context manager timing the block it wraps as stage
+    """
+    if not METRICS_ENABLED:
+        return _NULL_TIMER
+    return _Timer(histogram(STAGE_METRIC, stage=stage))
+
+
+def instrument(stage: str):
+    """ Decorator timing every call of the function as stage
+    """
+    def decorator(func):
+        """ Wrap func, or return it as is when metrics are off
+        """
+        if not METRICS_ENABLED:
+            return func
+        stage_histogram = histogram(STAGE_METRIC, stage=stage)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            """ Call func and record how long it took
+            """
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stage_histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def instrument_classmethod(cls, name: str, stage: str) -> None:
+    """ Time every call of the classmethod cls.name as stage, for
+    classes that can't import this module themselves
+    """
+    if not METRICS_ENABLED:
+        return
+    func = cls.__dict__[name].__func__
+    setattr(cls, name, classmethod(instrument(stage)(func)))
+
+
+def _format_labels(labels) -> str:
+    """ Render label pairs as {name="value",...}
+    """
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    """ Render a sample value
+    """
+    return repr(float(value))
+
+
+def render() -> str:
+    """ Return every metric in the Prometheus text format
+    """
+    lines = []
+    with _histograms_lock:
+        items = sorted(_histograms.items())
+    current = None
+    for (name, labels), hist in items:
+        if name != current:
+            current = name
+            lines.append('# HELP {} {}'.format(name, HELP.get(name, name)))
+            lines.append('# TYPE {} histogram'.format(name))
+        cumulative, total, count = hist.snapshot()
+        bounds = [_format_value(b) for b in hist.buckets] + ['+Inf']
+        for bound, bucket_count in zip(bounds, cumulative):
+            lines.append('{}_bucket{} {}'.format(
+                name, _format_labels(labels + (('le', bound),)),
+                bucket_count))
+        lines.append('{}_sum{} {}'.format(
+            name, _format_labels(labels), _format_value(total)))
+        lines.append('{}_count{} {}'.format(
+            name, _format_labels(labels), count))
+
+    # Throughput of the last load of each model from its file
+    from models.base import LOAD_STATS
+    for stat, help_text in (('objects', 'Objects read by the last load.'),
+                            ('seconds', 'Duration of the last load.')):
+        name = 'models_load_{}'.format(stat)
+        lines.append('# HELP {} {}'.format(name, help_text))
+        lines.append('# TYPE {} gauge'.format(name))
+        for model, stats in sorted(LOAD_STATS.items()):
+            lines.append('{}{} {}'.format(
+                name, _format_labels((('model', model),)),
+                _format_value(stats[stat])))
+    return '\n'.join(lines) + '\n'
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """ Module of Index views
 """
-from flask import jsonify, abort
+from flask import Response, jsonify, abort
+from api.v1.metrics import METRICS_ENABLED, render
 from api.v1.views import app_views
 
 
@@ -42,3 +43,15 @@ def forbidden() -> str:
       - raise a 403 error by using abort
     """
     abort(403)
+
+
+@app_views.route('/metrics', methods=['GET'], strict_slashes=False)
+def metrics() -> str:
+    """ GET /api/v1/metrics
+    Return:
+      - the latency histograms in the Prometheus text format,
+        or a 404 error when API_METRICS is off
+    """
+    if not METRICS_ENABLED:
+        abort(404)
+    return Response(render(), mimetype='text/plain; version=0.0.4')
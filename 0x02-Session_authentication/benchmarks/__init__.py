@@ -0,0 +1,3 @@
+#!/usr/bin/env python3
+""" Benchmarks of the Session authentication API and its models
+"""
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+""" Load test: latency percentiles and requests/sec of the API with
+Basic and session authentication, and of the model operations behind
+them, for 10^3 users up to max_users
+
+Every request runs through the Flask test client from concurrent
+client threads, against users seeded into a temporary directory.
+
+Usage (from the project root):
+    python3 -m benchmarks.load [max_users] [requests] [clients]
+
+e.g. python3 -m benchmarks.load 1000000 5000 16
+"""
+import base64
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+
+PASSWORD = "pwd"
+TIMESTAMP = "2024-01-01T00:00:00"
+
+
+def email_of(i: int) -> str:
+    """ Email of the i-th seeded user
+    """
+    return "user{}@hbtn.io".format(i)
+
+
+def seed(count: int, password_hash: str) -> None:
+    """ Write count users to .db_User.json, one record at a time
+    """
+    with open(".db_User.json", "w") as f:
+        f.write("{")
+        for i in range(count):
+            obj_id = str(uuid.uuid4())
+            f.write("{}{}: {}".format("," if i else "", json.dumps(obj_id),
+                                      json.dumps({
+                                          "id": obj_id,
+                                          "created_at": TIMESTAMP,
+                                          "updated_at": TIMESTAMP,
+                                          "email": email_of(i),
+                                          "_password": password_hash,
+                                          "first_name": "Bob",
+                                          "last_name": "Dylan",
+                                      })))
+        f.write("}")
+
+
+def percentile(values: list, p: float) -> float:
+    """ Nearest-rank percentile of sorted values
+    """
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1,
+                             math.ceil(p / 100 * len(values)) - 1))]
+
+
+def report(users: int, name: str, latencies: list, elapsed: float,
+           errors: int = 0, count: int = None) -> None:
+    """ Print one result line, latencies in ms; the rate is count
+    (one per latency by default) per second
+    """
+    latencies = sorted(latencies)
+    count = len(latencies) if count is None else count
+    print("{:>8} {:<18} {:>7} {:>9.0f} {:>8.3f} {:>8.3f} {:>8.3f} {:>6}"
+          .format(users, name, count,
+                  count / elapsed if elapsed > 0 else 0.0,
+                  percentile(latencies, 50) * 1000,
+                  percentile(latencies, 95) * 1000,
+                  percentile(latencies, 99) * 1000, errors))
+
+
+def drive(app, users: int, requests: int, clients: int,
+          send, prepare=None) -> tuple:
+    """ Run requests calls of send(client, rng) spread over clients
+    threads, each with its own test client set up by prepare(client,
+    rng). send returns False on an unexpected response.
+
+    Returns:
+      - (latencies in seconds, elapsed seconds, errors)
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    ready = threading.Barrier(clients + 1)
+    per_client = max(1, requests // clients)
+
+    def client_loop(number: int) -> None:
+        """ Send the requests of one client
+        """
+        rng = random.Random(number)
+        client = app.test_client()
+        if prepare is not None:
+            prepare(client, rng)
+        local = []
+        failed = 0
+        ready.wait()
+        for _ in range(per_client):
+            start = time.perf_counter()
+            ok = send(client, rng)
+            local.append(time.perf_counter() - start)
+            if not ok:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client_loop, args=(number,))
+               for number in range(clients)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start, errors[0]
+
+
+def bench_models(users: int, lookups: int = 1000) -> None:
+    """ Report User.load_from_file, User.search by email and
+    User.save_to_file for the seeded users, the file operations in
+    users/sec
+    """
+    from models.base import LOAD_STATS
+    from models.user import User
+
+    User.load_from_file()
+    elapsed = LOAD_STATS["User"]["seconds"]
+    report(users, "load_from_file", [elapsed], elapsed, count=users)
+
+    rng = random.Random(0)
+    latencies = []
+    for _ in range(lookups):
+        email = email_of(rng.randrange(users))
+        start = time.perf_counter()
+        User.search({"email": email})
+        latencies.append(time.perf_counter() - start)
+    report(users, "search(email)", latencies, sum(latencies))
+
+    start = time.perf_counter()
+    User.save_to_file()
+    elapsed = time.perf_counter() - start
+    report(users, "save_to_file", [elapsed], elapsed, count=users)
+
+
+def bench_api(users: int, requests: int, clients: int) -> None:
+    """ Report GET /api/v1/users/me with Basic auth, session logins and
+    GET /api/v1/users/me with a session cookie
+    """
+    import api.v1.app as api_app
+    from api.v1.auth.basic_auth import BasicAuth
+    from api.v1.auth.session_auth import SessionAuth
+    app = api_app.app
+
+    def basic_me(client, rng) -> bool:
+        """ Fetch the profile of a random user with Basic auth
+        """
+        credentials = "{}:{}".format(email_of(rng.randrange(users)),
+                                     PASSWORD)
+        response = client.get("/api/v1/users/me", headers={
+            "Authorization": "Basic " + base64.b64encode(
+                credentials.encode()).decode()})
+        return response.status_code == 200
+
+    def login(client, rng) -> bool:
+        """ Log in as a random user
+        """
+        response = client.post("/api/v1/auth_session/login", data={
+            "email": email_of(rng.randrange(users)),
+            "password": PASSWORD})
+        return response.status_code == 200
+
+    def session_me(client, rng) -> bool:
+        """ Fetch the profile of the logged in user
+        """
+        return client.get("/api/v1/users/me").status_code == 200
+
+    api_app.auth = BasicAuth()
+    report(users, "basic /users/me",
+           *drive(app, users, requests, clients, basic_me))
+    api_app.auth = SessionAuth()
+    report(users, "session login",
+           *drive(app, users, requests, clients, login))
+    report(users, "session /users/me",
+           *drive(app, users, requests, clients, session_me, login))
+
+
+def main(max_users: int = 100000, requests: int = 2000,
+         clients: int = 8):
+    """ Seed 10^3, 10^4, ... max_users users and benchmark each size
+    """
+    os.environ.setdefault("SESSION_NAME", "_my_session_id")
+    project_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            run(max_users, requests, clients)
+        finally:
+            os.chdir(project_dir)
+
+
+def run(max_users: int, requests: int, clients: int):
+    """ Benchmark every size from the current directory
+    """
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    import api.v1.app  # noqa: F401 (loads the empty user file)
+    from models.user import User
+
+    hasher = User()
+    hasher.password = PASSWORD
+
+    print("{:>8} {:<18} {:>7} {:>9} {:>8} {:>8} {:>8} {:>6}".format(
+        "users", "benchmark", "count", "per sec", "p50 ms", "p95 ms",
+        "p99 ms", "errors"))
+    users = 1000
+    while users <= max_users:
+        seed(users, hasher.password)
+        bench_models(users)
+        bench_api(users, requests, clients)
+        users *= 10
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+""" Memory benchmark: bytes per cached User instance
+
+Usage (from the project root):
+    python3 -m benchmarks.memory_per_user [count]
+"""
+import sys
+import tracemalloc
+from models.user import User
+
+
+FIELDS = ('id', 'created_at', 'updated_at',
+          'email', '_password', 'first_name', 'last_name')
+
+
+class DictUser():
+    """ Plain class storing the User attributes in a per-instance
+    __dict__, the layout used before User declared __slots__
+    """
+
+
+def copy_user(cls, user: User):
+    """ Build an instance of cls sharing every attribute value of user
+    """
+    obj = cls.__new__(cls)
+    for name in FIELDS:
+        setattr(obj, name, getattr(user, name))
+    return obj
+
+
+def bytes_per_user(cls, users: list) -> float:
+    """ Average traced allocation of one cls instance
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copies = [copy_user(cls, user) for user in users]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copies
+    return (after - before) / len(users)
+
+
+def main(count: int = 100000):
+    """ Print bytes per user for both layouts
+    """
+    users = [User(email="user{}@hbtn.io".format(i), first_name="Bob",
+                  last_name="Dylan", _password="0" * 64)
+             for i in range(count)]
+    print("users: {}".format(count))
+    print("__dict__ layout: {:.1f} bytes/user".format(
+        bytes_per_user(DictUser, users)))
+    print("__slots__ layout: {:.1f} bytes/user".format(
+        bytes_per_user(User, users)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+""" Serialization benchmark: users per second through to_json and
+the JSON encoders
+
+Usage (from the project root):
+    python3 -m benchmarks.serialization [count]
+"""
+from datetime import datetime
+import json
+import sys
+import time
+from models.base import TIMESTAMP_FORMAT
+from models.user import User
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+FIELDS = ('id', 'created_at', 'updated_at',
+          'email', '_password', 'first_name', 'last_name')
+
+
+def legacy_to_json(user: User) -> dict:
+    """ to_json as written before the field plan: walk every
+    attribute and format each timestamp with strftime
+    """
+    result = {}
+    for key in FIELDS:
+        if key[0] == '_':
+            continue
+        value = getattr(user, key)
+        if type(value) is datetime:
+            result[key] = value.strftime(TIMESTAMP_FORMAT)
+        else:
+            result[key] = value
+    return result
+
+
+def users_per_second(func, users: list, rounds: int = 3) -> float:
+    """ Best throughput of func over the users list
+    """
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(users)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(users) / best
+
+
+def main(count: int = 100000):
+    """ Print users/sec of each serialization step
+    """
+    users = [User(email="user{}@hbtn.io".format(i), first_name="Bob",
+                  last_name="Dylan", _password="0" * 64)
+             for i in range(count)]
+    payload = [user.to_json() for user in users]
+    steps = [
+        ("legacy to_json", lambda us: [legacy_to_json(u) for u in us]),
+        ("to_json", lambda us: [u.to_json() for u in us]),
+        ("json.dumps", lambda us: json.dumps(
+            payload, separators=(',', ':'), sort_keys=True)),
+    ]
+    if orjson is not None:
+        steps.append(("orjson.dumps", lambda us: orjson.dumps(
+            payload, option=orjson.OPT_SORT_KEYS)))
+    print("users: {}".format(count))
+    for name, func in steps:
+        print("{:<16} {:>12,.0f} users/sec".format(
+            name, users_per_second(func, users)))
+    if orjson is None:
+        print("orjson is not installed")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -2,7 +2,7 @@
 """
 Basic Flask app
 """
-from flask import Flask, jsonify, request
+from flask import Flask, abort, jsonify, redirect, request
 from auth import Auth
 
 app = Flask(__name__)
@@ -10,6 +10,14 @@ app = Flask(__name__)
 AUTH = Auth()
 
 
+@app.teardown_appcontext
+def close_db_session(exception=None) -> None:
+    """
+    Releases the database session used by the request.
+    """
+    AUTH.close_db_session()
+
+
 @app.route("/", methods=["GET"])
 def welcome():
     """
@@ -32,10 +40,14 @@ def users():
             - {"email": "<registered email>", "message": "user created"}
               if user is successfully registered.
             - {"message": "email already registered"} if user already exists.
+            - {"message": "email and password required"} if either is
+              missing, with status 400.
     """
     # Get form data
     email = request.form.get("email")
     password = request.form.get("password")
+    if not email or not password:
+        return jsonify({"message": "email and password required"}), 400
 
     try:
         # Register the user using AUTH
@@ -46,5 +58,63 @@ def users():
         return jsonify({"message": "email already registered"}), 400
 
 
+@app.route("/sessions", methods=["POST"])
+def login():
+    """
+    POST /sessions endpoint to log a user in.
+
+    Expects form data with:
+        - email: user's email
+        - password: user's password
+
+    Returns:
+        JSON response {"email": "<email>", "message": "logged in"} with
+        a session_id cookie, or 401 if the credentials are wrong.
+    """
+    email = request.form.get("email")
+    password = request.form.get("password")
+    if not AUTH.valid_login(email, password):
+        abort(401)
+
+    session_id = AUTH.create_session(email)
+    response = jsonify({"email": email, "message": "logged in"})
+    response.set_cookie("session_id", session_id)
+    return response
+
+
+@app.route("/sessions", methods=["DELETE"])
+def logout():
+    """
+    DELETE /sessions endpoint to log the user out.
+
+    Expects the session_id cookie.
+
+    Returns:
+        Redirect to GET /, or 403 if the session doesn't exist.
+    """
+    user = AUTH.get_user_from_session_id(request.cookies.get("session_id"))
+    if user is None:
+        abort(403)
+    AUTH.destroy_session(user.id)
+    return redirect("/")
+
+
+@app.route("/profile", methods=["GET"])
+def profile():
+    """
+    GET /profile endpoint returning the logged in user.
+
+    Expects the session_id cookie.
+
+    Returns:
+        JSON response {"email": "<email>"}, or 403 if the session
+        doesn't exist.
+    """
+    user = AUTH.get_user_from_session_id(request.cookies.get("session_id"))
+    if user is None:
+        abort(403)
+    return jsonify({"email": user.email}), 200
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port="5000", debug=True)
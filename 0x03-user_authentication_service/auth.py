@@ -2,9 +2,22 @@
 """
 Authentication module.
 """
+import csv
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import IO, Iterable, Iterator, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import NoResultFound
 from db import DB
 from user import User
-from bcrypt import hashpw, gensalt, checkpw
+from hashing import get_hashing_service, hash_with_rounds
 
 
 def _hash_password(password: str) -> bytes:
@@ -19,14 +32,131 @@ def _hash_password(password: str) -> bytes:
     """
     if not isinstance(password, str) or not password:
         raise ValueError("Password must be a non-empty string.")
-    return hashpw(password.encode('utf-8'), gensalt())
+    return get_hashing_service().hash(password)
+
+
+def _generate_uuid() -> str:
+    """
+    Generate a new UUID.
+
+    Returns:
+        str: String representation of a uuid4.
+    """
+    return str(uuid.uuid4())
+
+
+class SessionCache:
+    """
+    Read-through cache of session ID -> user, kept in process memory.
+
+    Entries expire ttl seconds after being stored; the least recently
+    used entry is evicted beyond maxsize. Cached users are detached
+    copies holding id, email and session_id, safe to share between
+    threads and requests. A ttl of 0 disables the cache.
+
+    Invalidation only reaches this process: use it with a single worker,
+    or with a ttl short enough for sessions ended by other workers to
+    keep working that long.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[User]:
+        """
+        Return the cached user of session_id, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return entry[0]
+
+    def set(self, session_id: str, user: User) -> None:
+        """
+        Cache a detached copy of user under session_id.
+        """
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        snapshot = User(id=user.id, email=user.email, session_id=session_id)
+        with self._lock:
+            self._entries[session_id] = (snapshot, time.monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: Optional[str]) -> None:
+        """
+        Drop session_id from the cache.
+        """
+        if session_id is None:
+            return
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+def read_credentials(
+        stream: IO[str], fmt: str = "csv"
+) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    """
+    Read (email, password) pairs from a CSV or JSON Lines stream.
+
+    CSV rows hold email,password (an "email,password" header row is
+    skipped); JSONL lines hold {"email": ..., "password": ...}.
+    Unreadable rows yield (None, None) so they can be reported.
+
+    Args:
+        stream: Text stream to read.
+        fmt (str): "csv" or "jsonl".
+
+    Yields:
+        tuple: email and password of each row.
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.reader(stream)):
+            if number == 0 and row == ["email", "password"]:
+                continue
+            if len(row) != 2:
+                yield None, None
+            else:
+                yield row[0], row[1]
+    elif fmt == "jsonl":
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+                yield obj.get("email"), obj.get("password")
+            except (ValueError, AttributeError):
+                yield None, None
+    else:
+        raise ValueError("Unknown credentials format: {}".format(fmt))
 
 
 class Auth:
     """Auth class to interact with the authentication database."""
 
-    def __init__(self):
-        self._db = DB()
+    def __init__(self, db: Optional[DB] = None):
+        self._db = db if db is not None else DB()
+        # Off unless AUTH_SESSION_CACHE_TTL is set: the cache is only
+        # invalidated in this process, so with several workers a session
+        # ended or replaced elsewhere stays valid here for up to the TTL
+        self._session_cache = SessionCache(
+            maxsize=int(os.getenv("AUTH_SESSION_CACHE_SIZE", "10000")),
+            ttl=float(os.getenv("AUTH_SESSION_CACHE_TTL", "0")))
+
+    def close_db_session(self) -> None:
+        """
+        Release the database session of the current request.
+        """
+        self._db.remove_session()
 
     def valid_login(self, email: str, password: str) -> bool:
         """
@@ -44,15 +174,101 @@ class Auth:
             user = self._db.find_user_by(email=email)
 
             # Check if the provided password matches the stored hashed password
-            if checkpw(
-                password.encode('utf-8'),
-                user.hashed_password.encode('utf-8')
-            ):
-                return True
-            return False
+            hashing = get_hashing_service()
+            hashed_password = user.hashed_password.encode('utf-8')
+            if not hashing.check(hashed_password, password):
+                return False
+
+            # Upgrade hashes made with an outdated cost factor; a failed
+            # upgrade must not fail the login itself
+            if hashing.needs_rehash(hashed_password):
+                try:
+                    self._db.update_user(
+                        user.id,
+                        hashed_password=hashing.hash(password).decode('utf-8')
+                    )
+                except Exception:
+                    pass
+            return True
         except Exception:
             return False
 
+    def register_users(
+            self,
+            credentials: Iterable[Tuple[str, str]],
+            batch_size: int = 1000,
+            workers: Optional[int] = None
+    ) -> dict:
+        """
+        Register many users at once.
+
+        Each batch is checked against existing emails with one query,
+        hashed across worker processes and inserted in one transaction.
+        Rejected rows are reported instead of aborting the import.
+
+        Args:
+            credentials: Iterable of (email, password), e.g. from
+            read_credentials().
+            batch_size (int): Rows per query/transaction.
+            workers (int): Hashing processes, one per CPU if None.
+
+        Returns:
+            dict: "created", the number of users registered, and
+            "errors", a list of (row number, email, message) with row
+            numbers starting at 1.
+        """
+        report = {"created": 0, "errors": []}
+        workers = workers or os.cpu_count() or 1
+        rows = enumerate(credentials, 1)
+        seen = set()
+        hash_password = partial(hash_with_rounds,
+                                rounds=get_hashing_service().rounds)
+
+        with ProcessPoolExecutor(workers) as pool:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+
+                valid = []
+                for number, (email, password) in batch:
+                    if not isinstance(email, str) or not email or \
+                            not isinstance(password, str) or not password:
+                        report["errors"].append(
+                            (number, email, "invalid email or password"))
+                    elif email in seen:
+                        report["errors"].append(
+                            (number, email, "duplicate email in input"))
+                    else:
+                        seen.add(email)
+                        valid.append((number, email, password))
+
+                existing = self._db.find_existing_emails(
+                    email for _, email, _ in valid)
+                new = []
+                for number, email, password in valid:
+                    if email in existing:
+                        report["errors"].append(
+                            (number, email, "email already registered"))
+                    else:
+                        new.append((number, email, password))
+
+                hashes = pool.map(hash_password,
+                                  [password for _, _, password in new],
+                                  chunksize=max(1, len(new) // (4 * workers)))
+                db_rows = [{"email": email, "hashed_password": hashed}
+                           for (_, email, _), hashed in zip(new, hashes)]
+                failed = dict(self._db.add_users(db_rows))
+                for position, (number, email, _) in enumerate(new):
+                    if position in failed:
+                        report["errors"].append(
+                            (number, email, failed[position]))
+                    else:
+                        report["created"] += 1
+
+        report["errors"].sort(key=lambda error: error[0])
+        return report
+
     def register_user(self, email: str, password: str) -> User:
         """
         Register a new user with an email and password.
@@ -65,13 +281,74 @@ class Auth:
             User: The created User object.
 
         Raises:
-            ValueError: If the email is already registered.
+            ValueError: If the email is missing or already registered,
+            or the password is missing.
         """
+        if not isinstance(email, str) or not email:
+            raise ValueError("Email must be a non-empty string.")
+
+        # Insert directly and let the unique index on users.email reject
+        # duplicates: one round trip, and no window between a check and
+        # the insert for a concurrent signup to slip through
+        hashed_password = _hash_password(password)
         try:
-            # Check if the user already exists
-            self._db.find_user_by(email=email)
-            raise ValueError(f"User {email} already exists")
-        except Exception:
-            # If user is not found, proceed to create one
-            hashed_password = _hash_password(password)
             return self._db.add_user(email, hashed_password.decode('utf-8'))
+        except IntegrityError:
+            raise ValueError(f"User {email} already exists")
+
+    def create_session(self, email: str) -> Optional[str]:
+        """
+        Create a session for the user with the given email.
+
+        Args:
+            email (str): The user's email.
+
+        Returns:
+            str: The new session ID, or None if no user has this email.
+        """
+        try:
+            user = self._db.find_user_by(email=email)
+        except NoResultFound:
+            return None
+        # The previous session of the user stops being valid
+        self._session_cache.invalidate(user.session_id)
+        session_id = _generate_uuid()
+        self._db.update_user(user.id, session_id=session_id)
+        return session_id
+
+    def get_user_from_session_id(self, session_id: str) -> Optional[User]:
+        """
+        Find the user owning a session, from the cache when possible.
+
+        Args:
+            session_id (str): The session ID.
+
+        Returns:
+            User: The user, or None if the session doesn't exist.
+        """
+        if session_id is None:
+            return None
+        user = self._session_cache.get(session_id)
+        if user is not None:
+            return user
+        try:
+            user = self._db.find_user_by(session_id=session_id)
+        except NoResultFound:
+            return None
+        self._session_cache.set(session_id, user)
+        return user
+
+    def destroy_session(self, user_id: int) -> None:
+        """
+        End the session of a user.
+
+        Args:
+            user_id (int): The user's ID.
+        """
+        try:
+            user = self._db.find_user_by(id=user_id)
+        except NoResultFound:
+            return None
+        self._session_cache.invalidate(user.session_id)
+        self._db.update_user(user_id, session_id=None)
+        return None
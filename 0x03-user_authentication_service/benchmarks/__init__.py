@@ -0,0 +1,4 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the user authentication service.
+"""
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Stress test: concurrent Auth.register_user calls for the same emails.
+
+Every email must end up registered exactly once, with every other
+attempt rejected with ValueError. Exits with status 1 otherwise.
+
+Usage (from the project root):
+    python3 -m benchmarks.concurrent_signup [threads] [emails]
+"""
+import os
+import sys
+import tempfile
+import threading
+from auth import Auth
+from db import DB
+from user import User
+
+
+def main(threads: int = 32, emails: int = 20) -> int:
+    """
+    Run threads signups per email concurrently and check the outcome.
+    """
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        auth = Auth(DB("sqlite:///" + os.path.join(tmp_dir, "stress.db"),
+                       reset=True))
+        created = []
+        rejected = []
+        failed = []
+        start = threading.Barrier(threads)
+
+        def signup(worker: int) -> None:
+            """Register every email, recording each outcome."""
+            start.wait()
+            for i in range(emails):
+                email = "user{}@hbtn.io".format(i)
+                try:
+                    auth.register_user(email, "pw{}".format(worker))
+                    created.append(email)
+                except ValueError:
+                    rejected.append(email)
+                except Exception as err:
+                    failed.append(repr(err))
+                finally:
+                    auth.close_db_session()
+
+        workers = [threading.Thread(target=signup, args=(worker,))
+                   for worker in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        rows = auth._db._session.query(User).count()
+        auth.close_db_session()
+
+    print("created: {}, rejected: {}, errors: {}, rows: {}".format(
+        len(created), len(rejected), len(failed), rows))
+    ok = (sorted(created) == sorted(set(created)) and
+          len(created) == emails and rows == emails and
+          len(rejected) == emails * (threads - 1) and not failed)
+    print("OK" if ok else "FAILED: {}".format(failed[:5]))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:3])))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Load test: latency percentiles and requests/sec of POST /users,
+POST /sessions and GET /profile for 10^3 users up to max_users.
+
+Every request runs through the Flask test client from concurrent
+client threads, against a temporary SQLite database. bcrypt runs with
+BCRYPT_ROUNDS (4 unless set) so the hashing path stays measurable at
+every size.
+
+Usage (from the project root):
+    python3 -m benchmarks.load [max_users] [requests] [clients]
+
+e.g. BCRYPT_ROUNDS=12 python3 -m benchmarks.load 1000000 2000 16
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+
+PASSWORD = "pwd"
+
+
+def email_of(i: int) -> str:
+    """
+    Email of the i-th seeded user.
+    """
+    return "user{}@hbtn.io".format(i)
+
+
+def seed(db, first: int, last: int, hashed_password: str,
+         batch_size: int = 50000) -> None:
+    """
+    Insert users first to last - 1, all sharing hashed_password.
+    """
+    for start in range(first, last, batch_size):
+        db.add_users([
+            {"email": email_of(i), "hashed_password": hashed_password}
+            for i in range(start, min(start + batch_size, last))
+        ])
+    db.remove_session()
+
+
+def percentile(values: list, p: float) -> float:
+    """
+    Nearest-rank percentile of sorted values.
+    """
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1,
+                             math.ceil(p / 100 * len(values)) - 1))]
+
+
+def report(users: int, name: str, latencies: list, elapsed: float,
+           errors: int = 0) -> None:
+    """
+    Print one result line, latencies in ms.
+    """
+    latencies = sorted(latencies)
+    print("{:>8} {:<16} {:>7} {:>9.0f} {:>8.3f} {:>8.3f} {:>8.3f} {:>6}"
+          .format(users, name, len(latencies),
+                  len(latencies) / elapsed if elapsed > 0 else 0.0,
+                  percentile(latencies, 50) * 1000,
+                  percentile(latencies, 95) * 1000,
+                  percentile(latencies, 99) * 1000, errors))
+
+
+def drive(app, requests: int, clients: int, send, prepare=None) -> tuple:
+    """
+    Run requests calls of send(client, rng) spread over clients threads,
+    each with its own test client set up by prepare(client, rng).
+    send returns False on an unexpected response.
+
+    Returns:
+        tuple: latencies in seconds, elapsed seconds and errors.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    ready = threading.Barrier(clients + 1)
+    per_client = max(1, requests // clients)
+
+    def client_loop(number: int) -> None:
+        """Send the requests of one client."""
+        rng = random.Random(number)
+        client = app.test_client()
+        if prepare is not None:
+            prepare(client, rng)
+        local = []
+        failed = 0
+        ready.wait()
+        for _ in range(per_client):
+            start = time.perf_counter()
+            ok = send(client, rng)
+            local.append(time.perf_counter() - start)
+            if not ok:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client_loop, args=(number,))
+               for number in range(clients)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start, errors[0]
+
+
+def main(max_users: int = 100000, requests: int = 1000,
+         clients: int = 8) -> None:
+    """
+    Seed 10^3, 10^4, ... max_users users and benchmark each size.
+    """
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["AUTH_DB_URL"] = "sqlite:///" + os.path.join(
+            tmp_dir, "load.db")
+        os.environ["AUTH_DB_RESET"] = "1"
+        from app import AUTH, app
+        from hashing import get_hashing_service
+
+        hashed_password = get_hashing_service().hash(PASSWORD).decode()
+        seeded = 0
+
+        def users_post(client, rng) -> bool:
+            """Register a new user."""
+            response = client.post("/users", data={
+                "email": "new-{}@hbtn.io".format(uuid.uuid4()),
+                "password": PASSWORD})
+            return response.status_code == 200
+
+        def sessions_post(client, rng) -> bool:
+            """Log in as a random seeded user."""
+            response = client.post("/sessions", data={
+                "email": email_of(rng.randrange(seeded)),
+                "password": PASSWORD})
+            return response.status_code == 200
+
+        def profile_get(client, rng) -> bool:
+            """Fetch the profile of the logged in user."""
+            return client.get("/profile").status_code == 200
+
+        print("{:>8} {:<16} {:>7} {:>9} {:>8} {:>8} {:>8} {:>6}".format(
+            "users", "benchmark", "count", "per sec", "p50 ms", "p95 ms",
+            "p99 ms", "errors"))
+        users = 1000
+        while users <= max_users:
+            seed(AUTH._db, seeded, users, hashed_password)
+            seeded = users
+            report(users, "POST /users",
+                   *drive(app, requests, clients, users_post))
+            report(users, "POST /sessions",
+                   *drive(app, requests, clients, sessions_post))
+            report(users, "GET /profile",
+                   *drive(app, requests, clients, profile_get,
+                          sessions_post))
+            users *= 10
+        AUTH._db.remove_session()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: DB.find_user_by(email=...) latency with and without the
+users.email index.
+
+Usage (from the project root):
+    python3 -m benchmarks.lookup [users] [lookups]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from sqlalchemy import insert, text
+from db import DB
+from user import User
+
+
+def seed(db: DB, count: int, batch_size: int = 50000) -> None:
+    """
+    Insert count users named user<i>@hbtn.io in batches.
+    """
+    session = db._session
+    for first in range(0, count, batch_size):
+        session.execute(insert(User), [
+            {"email": "user{}@hbtn.io".format(i), "hashed_password": "x"}
+            for i in range(first, min(first + batch_size, count))
+        ])
+        session.commit()
+
+
+def lookup_latency(db: DB, count: int, lookups: int) -> float:
+    """
+    Average find_user_by(email=...) latency over random users, in ms.
+    """
+    emails = ["user{}@hbtn.io".format(random.randrange(count))
+              for _ in range(lookups)]
+    start = time.perf_counter()
+    for email in emails:
+        db.find_user_by(email=email)
+    return (time.perf_counter() - start) * 1000 / lookups
+
+
+def main(count: int = 10 ** 6, lookups: int = 200) -> None:
+    """
+    Print the lookup latency before and after indexing users.email.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        url = "sqlite:///" + os.path.join(tmp_dir, "bench.db")
+        db = DB(url, reset=True)
+        seed(db, count)
+        print("users: {}".format(count))
+
+        db._session.execute(text("DROP INDEX ix_users_email"))
+        db._session.commit()
+        print("without index: {:.3f} ms/lookup".format(
+            lookup_latency(db, count, max(1, lookups // 10))))
+
+        db.migrate()
+        print("with index:    {:.3f} ms/lookup".format(
+            lookup_latency(db, count, lookups)))
+        db.remove_session()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
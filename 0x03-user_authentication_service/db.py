@@ -2,44 +2,146 @@
 """ DB module
     Create user, Find User and Update User
 """
-from sqlalchemy import create_engine
+import os
+import warnings
+from typing import Dict, Iterable, List, Set, Tuple
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.session import Session
 from user import Base, User
 from sqlalchemy.orm.exc import NoResultFound
-from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.exc import (
+    IntegrityError, InvalidRequestError, SQLAlchemyError
+)
+
+
+def _create_engine(url: str) -> Engine:
+    """Create an engine with a connection pool sized for the API
+    AUTH_DB_POOL_SIZE / AUTH_DB_MAX_OVERFLOW size the pool of
+    server databases; SQLite files are shared across threads in WAL mode
+    """
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url, echo=False,
+            pool_size=int(os.getenv("AUTH_DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("AUTH_DB_MAX_OVERFLOW", "20")),
+            pool_pre_ping=True,
+            pool_recycle=3600)
+
+    engine = create_engine(
+        url, echo=False, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Let readers run while another thread writes"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
 
 
 class DB:
     """DB class
     """
 
-    def __init__(self) -> None:
+    def __init__(self, url: str = None, reset: bool = None) -> None:
         """Initialize a new DB instance
+        url defaults to AUTH_DB_URL, else sqlite:///a.db
+        reset drops all tables first; it defaults to AUTH_DB_RESET,
+        else True. Use reset=False (AUTH_DB_RESET=0) in production
         """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
+        if url is None:
+            url = os.getenv("AUTH_DB_URL", "sqlite:///a.db")
+        if reset is None:
+            reset = os.getenv("AUTH_DB_RESET", "1") == "1"
+        self._engine = _create_engine(url)
+        if reset:
+            Base.metadata.drop_all(self._engine)
         Base.metadata.create_all(self._engine)
-        self.__session = None
+        self.migrate()
+        self._sessions = scoped_session(sessionmaker(bind=self._engine))
+
+    def migrate(self) -> None:
+        """Create the indexes declared on the models that are missing
+        from tables created before they were declared
+        A unique index that can't be built because of duplicate rows is
+        skipped with a warning
+        """
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(self._engine, checkfirst=True)
+                except SQLAlchemyError as err:
+                    warnings.warn("Could not create index {}: {}".format(
+                        index.name, err))
 
     @property
     def _session(self) -> Session:
-        """Memoized session object
+        """Session of the current thread (one per request)
         """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        return self._sessions()
+
+    def remove_session(self) -> None:
+        """Close and forget the session of the current thread
+        """
+        self._sessions.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """ save the user to the database and returns a User object
+        raises IntegrityError (after rolling back) if the email exists
         """
         new_user = User(email=email, hashed_password=hashed_password)
         self._session.add(new_user)
-        self._session.commit()
+        try:
+            self._session.commit()
+        except IntegrityError:
+            self._session.rollback()
+            raise
         return new_user
 
+    def find_existing_emails(self, emails: Iterable[str]) -> Set[str]:
+        """returns the subset of emails already in the users table,
+        with one IN query per 500 emails
+        """
+        emails = list(emails)
+        existing = set()
+        for first in range(0, len(emails), 500):
+            chunk = emails[first:first + 500]
+            rows = self._session.query(User.email).filter(
+                User.email.in_(chunk))
+            existing.update(email for email, in rows)
+        return existing
+
+    def add_users(self, rows: List[Dict[str, str]]) -> List[Tuple[int, str]]:
+        """insert rows of email/hashed_password in one executemany
+        transaction; if it fails, rows are retried one by one so only
+        the offending ones are rejected
+        returns the (position in rows, error) of the rejected rows
+        """
+        if not rows:
+            return []
+        session = self._session
+        try:
+            session.execute(insert(User), rows)
+            session.commit()
+            return []
+        except IntegrityError:
+            session.rollback()
+
+        errors = []
+        for position, row in enumerate(rows):
+            try:
+                session.execute(insert(User), [row])
+                session.commit()
+            except IntegrityError as err:
+                session.rollback()
+                errors.append((position, str(err.orig)))
+        return errors
+
     def find_user_by(self, **kwargs) -> User:
         """returns the first row found in the users table"""
         if kwargs is None:
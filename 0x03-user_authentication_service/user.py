@@ -18,15 +18,15 @@ class User(Base):
         id (int): Primary key, unique identifier for
         each user.
         email (str): Non-nullable string representing the
-        user's email.
+        user's email, unique and indexed.
         hashed_password (str): Non-nullable string for
         storing hashed passwords.
-        session_id (str): Nullable string for session ID.
-        reset_token (str): Nullable string for reset token.
+        session_id (str): Nullable, indexed string for session ID.
+        reset_token (str): Nullable, indexed string for reset token.
     """
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True)
-    email = Column(String(250), nullable=False)
+    email = Column(String(250), nullable=False, unique=True, index=True)
     hashed_password = Column(String(250), nullable=False)
-    session_id = Column(String(250), nullable=True)
-    reset_token = Column(String(250), nullable=True)
+    session_id = Column(String(250), nullable=True, index=True)
+    reset_token = Column(String(250), nullable=True, index=True)